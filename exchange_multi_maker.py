@@ -0,0 +1,227 @@
+from math import isclose
+import logging
+from models.order import TOLERANCE, Order, OrderType
+from models.orderbook import OrderBook
+from models.transaction import Transaction
+from makers.maker import Maker
+from typing import Dict, Iterable, List, Tuple
+
+# exchange of several makers against the arbitrage taker, on a single book
+
+
+class ExchangeMultiMaker:
+    """Merges the offers of several makers in one OrderBook with price-time
+    priority: at a same tick, the order that reached the exchange first is
+    filled first. A fill is routed to the maker owning the order, every maker
+    gets the post_hook.
+
+    The resting orders of the makers are shared with the book, not copied.
+    Makers are re-synced from the change log of their offers (pop_changes):
+    only the orders added or removed since the last sync touch the book, and
+    orders still resting keep their priority (quantity changes included).
+    Makers should quote on the tickSize grid: off-grid orders raise a
+    ValueError, as orders of two makers sharing an id (build makers from a
+    template with clone(), which renews the ids). The book keeps the tick of
+    each order as the key of its level: maker orders are never modified.
+
+    Orders of different makers are not matched against each other: makers
+    only fill whole orders, against the taker. The book can therefore be
+    crossed (see crossed), midPrice is then meaningless, and an arbitrage step
+    only takes one side, the asks if the best one is at or below the price."""
+
+    transactions: List[Transaction]
+    makers: List[Maker]
+    book: OrderBook
+    time: float
+    # last arbitrage price (None before the first one)
+    price: float
+
+    @property
+    def offers(self) -> OrderBook:
+        return self.book
+
+    @property
+    def midPrice(self) -> float:
+        return self.book.midPrice
+
+    @property
+    def crossed(self) -> bool:
+        bid, ask = self.book.best_bid_tick(), self.book.best_ask_tick()
+        return bid is not None and ask is not None and bid >= ask
+
+    def __init__(self, makers: Iterable[Maker], tickSize: float):
+        """
+        makers   : the competing makers, in the order of their priority at start
+        tickSize : price grid of the book (ValueError if a maker quotes off it)
+        """
+        self.makers = list(makers)
+        self.book = OrderBook(tickSize)
+        self.transactions = []
+        # transactions of each maker
+        self.makerTransactions = [[] for _ in self.makers]
+        self.time = 0
+        self.price = None
+        # (order, tick) of the resting orders of each maker in the book, by id
+        self._resting: List[Dict[int, Tuple[Order, int]]] = [{} for _ in self.makers]
+        # order id -> index of its maker
+        self._owners: Dict[int, int] = {}
+        self.sync()
+
+    def _add(self, i: int, order: Order):
+        owner = self._owners.get(order.id)
+        if owner is not None and owner != i:
+            raise ValueError(
+                "{} of maker {} has the id of an order of maker {}.".format(
+                    order, i, owner
+                )
+            )
+        tick = self.book.add_order(order)
+        if tick is None:
+            raise ValueError(
+                "{} of maker {} is off the {} grid.".format(
+                    order, i, self.book.tickSize
+                )
+            )
+        self._resting[i][order.id] = (order, tick)
+        self._owners[order.id] = i
+
+    def _remove(self, i: int, orderId: int):
+        # orders taken by the exchange already left the book
+        resting = self._resting[i].pop(orderId, None)
+        if resting is not None:
+            self.book.remove_order(*resting)
+            del self._owners[orderId]
+
+    def _sync_maker(self, i: int):
+        offers = self.makers[i].offers
+        changes = offers.pop_changes()
+        if changes is None:
+            # no log yet (or lists changed in place): read the whole lists,
+            # orders still resting keep their place
+            orders = list(offers.ranked_bids) + list(offers.ranked_asks)
+            ids = {order.id for order in orders}
+            for orderId in [k for k in self._resting[i] if k not in ids]:
+                self._remove(i, orderId)
+            for order in orders:
+                if order.id not in self._resting[i]:
+                    self._add(i, order)
+            return
+
+        for orderId, order in changes:
+            if orderId is None:
+                for restingId in list(self._resting[i]):
+                    self._remove(i, restingId)
+            elif order is None:
+                self._remove(i, orderId)
+            else:
+                self._add(i, order)
+
+    def sync(self):
+        """Bring the book up to date with the offers of every maker"""
+        for i in range(len(self.makers)):
+            self._sync_maker(i)
+
+    def _take(self, orderType: OrderType) -> Transaction:
+        """Take the best order of a side of the book (asks for SELL) from its
+        maker. None, with the book unchanged, if the maker would fill another
+        order: its best offer is then liquidity redeployed since the last sync.
+        The maker is not re-synced: what it redeploys is only seen at the next
+        sync."""
+        if orderType == OrderType.SELL:
+            order = self.book.get_best_ask()
+        else:
+            order = self.book.get_best_bid()
+        i = self._owners[order.id]
+        maker = self.makers[i]
+        if orderType == OrderType.SELL:
+            own = maker.offers.get_best_ask()
+        else:
+            own = maker.offers.get_best_bid()
+        if own is None or own.id != order.id:
+            return None
+
+        if orderType == OrderType.SELL:
+            self.book.pop_best_ask()
+            transaction = maker.buy_at_first_rank()
+        else:
+            self.book.pop_best_bid()
+            transaction = maker.sell_at_first_rank()
+        del self._owners[order.id]
+        del self._resting[i][order.id]
+
+        if transaction and transaction.order_id != order.id:
+            logging.error(
+                "maker {} filled order {} instead of {}".format(
+                    i, transaction.order_id, order.id
+                )
+            )
+        if transaction:
+            transaction.time = self.time
+            self.transactions.append(transaction)
+            self.makerTransactions[i].append(transaction)
+        return transaction
+
+    def buy_at_first_rank(self) -> Transaction:
+        self.sync()
+        if not self.book.has_ask():
+            logging.error("No offer available, transaction failed.")
+            return None
+        return self._take(OrderType.SELL)
+
+    def sell_at_first_rank(self) -> Transaction:
+        self.sync()
+        if not self.book.has_bid():
+            logging.error("No bid available, transaction failed.")
+            return None
+        return self._take(OrderType.BUY)
+
+    def _take_to_price(self, price: float):
+        """Orders are taken by priority until price fits in bid/offer. The
+        sweep stops on the first order at price, and on an order its maker
+        would not fill (see _take)."""
+        self.sync()
+
+        offer = self.book.get_best_ask()
+        if offer and offer.price <= price:
+            while offer and offer.price <= price:
+                if not self._take(OrderType.SELL):
+                    return
+                if isclose(offer.price, price, rel_tol=TOLERANCE):
+                    return
+                offer = self.book.get_best_ask()
+            return
+
+        bid = self.book.get_best_bid()
+        while bid and price <= bid.price:
+            if not self._take(OrderType.BUY):
+                return
+            if isclose(bid.price, price, rel_tol=TOLERANCE):
+                return
+            bid = self.book.get_best_bid()
+
+    def apply_arbitrage(self, price: float, time: float = None):
+        """logic of external price coming to arbitrage the exchange, then the
+        post_hook of every maker"""
+        self.time = time
+        self.price = price
+
+        self._take_to_price(price)
+
+        for maker in self.makers:
+            maker.post_hook(price, time)
+
+    def apply_arbitrage_path(self, prices: Iterable[float], times: Iterable[float]):
+        """apply_arbitrage on each (price, time) of a path"""
+        for price, time in zip(prices, times):
+            self.apply_arbitrage(price, time)
+
+    def apply_arbitrage_chunks(
+        self, chunks: Iterable[Iterable[float]], timeDelta: float, time: float = 0
+    ) -> float:
+        """apply_arbitrage on a path streamed by chunks, one price every
+        timeDelta after time. Returns the time of the last price."""
+        for chunk in chunks:
+            for price in chunk:
+                time += timeDelta
+                self.apply_arbitrage(price, time)
+        return time
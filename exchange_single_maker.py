@@ -1,9 +1,11 @@
-from cmath import isclose
-from models.order import TOLERANCE
+from math import isclose
+from models.order import TOLERANCE, OrderType
 from models.offers_lists import OffersLists
 from models.transaction import Transaction
 from makers.maker import Maker
-from typing import List
+from typing import Iterable, List, Tuple
+from numpy.random import default_rng
+from simul.path_generators import bridge_cross_probability, brownian_bridge_fill
 
 # first implementation of single-maker/single-taker exchange
 
@@ -12,6 +14,10 @@ class ExchangeSingleMaker:
 
     transactions: List[Transaction] = []
     time: float
+    # last arbitrage price (None before the first one)
+    price: float
+    # use the maker fast_forward_to_price when it has one
+    fastForward: bool
 
     @property
     def offers(self) -> OffersLists:
@@ -21,10 +27,13 @@ class ExchangeSingleMaker:
     def midPrice(self) -> float:
         return self.offers.midPrice
 
-    def __init__(self, maker: Maker) -> None:
+    def __init__(self, maker: Maker, seed: int = None, fastForward: bool = True):
         self.transactions = []
         self.maker = maker
         self.time = 0
+        self.price = None
+        self.rng = default_rng(seed)
+        self.fastForward = fastForward
 
     def buy_at_first_rank(self) -> Transaction:
         transaction = self.maker.buy_at_first_rank()
@@ -40,32 +49,136 @@ class ExchangeSingleMaker:
             self.transactions.append(transaction)
         return transaction
 
+    def depth_to_price(self, price: float) -> Tuple[float, float]:
+        """(quantity, notional) resting between the best offer and price, i.e.
+        what an arbitrage to price takes from the book as it stands (before the
+        maker redeploys). Signed from the taker: negative when bids are hit."""
+        ask = self.offers.get_best_ask()
+        if ask and ask.price <= price:
+            return self.offers.depth_to_price(OrderType.SELL, price)
+        bid = self.offers.get_best_bid()
+        if bid and price <= bid.price:
+            quantity, notional = self.offers.depth_to_price(OrderType.BUY, price)
+            return -quantity, -notional
+        return 0.0, 0.0
+
+    def price_for_depth(self, quantity: float) -> Tuple[float, float]:
+        """(last price, average price) of a sweep of the book as it stands,
+        buying asks for a positive quantity and selling to bids for a negative
+        one. None if the book is not deep enough."""
+        if quantity > 0:
+            return self.offers.price_for_depth(OrderType.SELL, quantity)
+        return self.offers.price_for_depth(OrderType.BUY, -quantity)
+
     def _take_to_price(self, price: float):
         """logic of external price coming to arbitrage the exchange. Maker
         orders are taken until price fit in bid/offer.
-        Warning on matching price with maker order limit (we dont trade the
-        liquidity redeployed, infinite loop if redeployed at same price).
+        The depth index of the book sizes the sweep: at most the orders
+        resting at price or better when it starts are taken. Makers react to
+        each fill (reposts, missing offer), so they are still taken one by
+        one. The sweep stops on the first order at price, and on liquidity
+        redeployed by the maker during the sweep (an offer that is not beyond
+        the last one taken).
         """
+        if self.fastForward:
+            transactions = self.maker.fast_forward_to_price(price)
+            if transactions is not None:
+                for transaction in transactions:
+                    transaction.time = self.time
+                self.transactions.extend(transactions)
+                return
+
         offer = self.offers.get_best_ask()
         if offer and offer.price <= price:
-            _ = self.buy_at_first_rank()
-            if offer and not isclose(offer.price, price, rel_tol=TOLERANCE):
-                self._take_to_price(price)
+            self._sweep(OrderType.SELL, price)
+            return
+        bid = self.offers.get_best_bid()
+        if bid and price <= bid.price:
+            self._sweep(OrderType.BUY, price)
+
+    def _sweep(self, orderType: OrderType, price: float):
+        """take the orders of a side (asks for SELL) up to price"""
+        if orderType == OrderType.SELL:
+            sign, best, take = 1, self.offers.get_best_ask, self.buy_at_first_rank
         else:
-            bid = self.offers.get_best_bid()
-            if bid and price <= bid.price:
-                _ = self.sell_at_first_rank()
-                if bid and not isclose(bid.price, price, rel_tol=TOLERANCE):
-                    self._take_to_price(price)
+            sign, best, take = -1, self.offers.get_best_bid, self.sell_at_first_rank
+
+        last = None
+        for _ in range(self.offers.orders_to_price(orderType, price)):
+            order = best()
+            if not order or sign * order.price > sign * price:
+                break
+            if last is not None and sign * order.price <= sign * last:
+                break
+            last = order.price
+            take()
+            if isclose(last, price, rel_tol=TOLERANCE):
+                break
 
     def apply_arbitrage(self, price: float, time: float = None):
         """logic of external price coming to arbitrage the exchange. Maker
-        orders are taken until price fit in bid/offer.
-        Warning on matching price with maker order limit (we dont trade the
-        liquidity redeployed, infinite loop if redeployed at same price).
+        orders are taken until price fit in bid/offer (the liquidity
+        redeployed during the sweep is not traded), then the maker post_hook
+        is called.
         """
         self.time = time
+        self.price = price
 
         self._take_to_price(price)
 
         self.maker.post_hook(price, time)
+
+    def apply_arbitrage_refined(
+        self,
+        price: float,
+        time: float,
+        yearlyVolat: float,
+        numSubSteps: int,
+        crossProbability: float = 1e-4,
+    ):
+        """apply_arbitrage for a coarse step (from the last price and time),
+        refined with a Brownian bridge of numSubSteps only when the probability
+        that the intraday path touches the best bid or ask exceeds
+        crossProbability. Most coarse steps stay far from the ladder and cost a
+        single apply_arbitrage, while steps around it get intraday fills."""
+        if self.price is None or time is None or self.time is None:
+            return self.apply_arbitrage(price, time)
+
+        dt = time - self.time
+        bid = self.offers.get_best_bid()
+        ask = self.offers.get_best_ask()
+        proba = max(
+            bridge_cross_probability(self.price, price, ask.price, yearlyVolat, dt)
+            if ask
+            else 0.0,
+            bridge_cross_probability(self.price, price, bid.price, yearlyVolat, dt)
+            if bid
+            else 0.0,
+        )
+        if proba > crossProbability:
+            fill = brownian_bridge_fill(
+                self.price, price, numSubSteps, yearlyVolat, dt, self.rng
+            )
+            subDt = dt / numSubSteps
+            start = self.time
+            for i, subPrice in enumerate(fill):
+                self.apply_arbitrage(subPrice, start + (i + 1) * subDt)
+
+        self.apply_arbitrage(price, time)
+
+    def apply_arbitrage_path(self, prices: Iterable[float], times: Iterable[float]):
+        """apply_arbitrage on each (price, time) of a path"""
+        for price, time in zip(prices, times):
+            self.apply_arbitrage(price, time)
+
+    def apply_arbitrage_chunks(
+        self, chunks: Iterable[Iterable[float]], timeDelta: float, time: float = 0
+    ) -> float:
+        """apply_arbitrage on a path streamed by chunks (e.g. from
+        iter_geom_brownian_path), one price every timeDelta after time. Only the
+        current chunk is kept in memory. Returns the time of the last price."""
+        for chunk in chunks:
+            for price in chunk:
+                time += timeDelta
+                self.apply_arbitrage(price, time)
+        return time
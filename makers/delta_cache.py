@@ -0,0 +1,112 @@
+from collections import OrderedDict
+from typing import Callable
+import numpy as np
+
+
+class DeltaCache:
+    """Bounded LRU cache of a static delta function x -> delta.
+
+    priceStep : if not None, prices are quantized to multiples of priceStep and
+                the delta is evaluated on the quantized price, so that nearby
+                ladder prices share an entry (the error is bounded by the curve
+                slope times priceStep / 2).
+    maxSize   : max number of entries, least recently used ones are evicted.
+    """
+
+    deltaFun: Callable[[float], float]
+    priceStep: float
+    maxSize: int
+
+    hits: int
+    misses: int
+    evictions: int
+
+    def __init__(
+        self,
+        deltaFun: Callable[[float], float],
+        priceStep: float = None,
+        maxSize: int = 100_000,
+    ) -> None:
+        if priceStep is not None and priceStep <= 0:
+            raise ValueError("priceStep should be positive.")
+        if maxSize <= 0:
+            raise ValueError("maxSize should be positive.")
+
+        self.deltaFun = deltaFun
+        self.priceStep = priceStep
+        self.maxSize = maxSize
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def __call__(self, x: float) -> float:
+        key = x if self.priceStep is None else round(x / self.priceStep)
+
+        value = self.entries.get(key)
+        if value is not None:
+            self.hits += 1
+            self.entries.move_to_end(key)
+            return value
+
+        self.misses += 1
+        value = self.deltaFun(x if self.priceStep is None else key * self.priceStep)
+        self.entries[key] = value
+        if len(self.entries) > self.maxSize:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+        return value
+
+    def evaluate(self, prices: np.ndarray) -> np.ndarray:
+        """__call__ on an array of prices: deltaFun must be vectorized, it is
+        called once on the prices missing from the cache"""
+        prices = np.asarray(prices, dtype=float)
+        if self.priceStep is None:
+            keys = prices.tolist()
+        else:
+            keys = np.rint(prices / self.priceStep).astype(np.int64).tolist()
+
+        values = np.empty(len(keys))
+        missing = {}
+        for i, key in enumerate(keys):
+            value = self.entries.get(key)
+            if value is None:
+                missing.setdefault(key, []).append(i)
+            else:
+                self.entries.move_to_end(key)
+                values[i] = value
+        self.hits += len(keys) - len(missing)
+        if not missing:
+            return values
+
+        self.misses += len(missing)
+        x = np.array(list(missing), dtype=float)
+        if self.priceStep is not None:
+            x *= self.priceStep
+        for key, value in zip(missing, np.asarray(self.deltaFun(x), float).tolist()):
+            self.entries[key] = value
+            values[missing[key]] = value
+        while len(self.entries) > self.maxSize:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+        return values
+
+    @property
+    def hitRate(self) -> float:
+        calls = self.hits + self.misses
+        return self.hits / calls if calls else 0.0
+
+    def stats(self) -> dict:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "size": len(self.entries),
+            "hitRate": self.hitRate,
+        }
+
+    def clear(self):
+        self.entries.clear()
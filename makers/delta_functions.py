@@ -0,0 +1,127 @@
+from typing import Callable
+import numpy as np
+from utils_black_scholes import call_delta
+
+# A delta function is vectorized when it takes numpy arrays of prices (and
+# times to live, broadcast together) and returns the array of deltas. It says so
+# with a `vectorized = True` attribute: makers then evaluate a whole ladder in a
+# single call. Legacy scalar callables are wrapped by as_vectorized.
+
+
+def is_vectorized(deltaFun: Callable[..., float]) -> bool:
+    return getattr(deltaFun, "vectorized", False)
+
+
+def try_vectorized(deltaFun: Callable[..., float], *args) -> np.ndarray:
+    """deltaFun on arrays (broadcast together), None if deltaFun is scalar-only"""
+    args = np.broadcast_arrays(*[np.asarray(a, dtype=float) for a in args])
+    if is_vectorized(deltaFun):
+        return np.asarray(deltaFun(*args), dtype=float)
+    try:
+        values = np.asarray(deltaFun(*args), dtype=float)
+    except (TypeError, ValueError, ZeroDivisionError):
+        return None
+    return values if values.shape == args[0].shape else None
+
+
+def evaluate_deltas(deltaFun: Callable[..., float], *args) -> np.ndarray:
+    """deltaFun on arrays, looping only if deltaFun is scalar-only"""
+    values = try_vectorized(deltaFun, *args)
+    if values is None:
+        values = np.vectorize(deltaFun, otypes=[float])(*args)
+    return values
+
+
+class ScalarDelta:
+    """Adapter of a legacy callable to the vectorized protocol. Scalar calls
+    go straight to the callable. Array calls first try the callable on the
+    arrays (numpy expressions often work as is) and loop over the elements if
+    it is scalar-only. The outcome is remembered in acceptsArrays."""
+
+    vectorized = True
+
+    deltaFun: Callable[..., float]
+    # None until the first array call
+    acceptsArrays: bool
+
+    def __init__(self, deltaFun: Callable[..., float]) -> None:
+        self.deltaFun = deltaFun
+        self.acceptsArrays = None
+
+    def __call__(self, *args):
+        if all(np.ndim(a) == 0 for a in args):
+            return self.deltaFun(*args)
+
+        if self.acceptsArrays is not False:
+            values = try_vectorized(self.deltaFun, *args)
+            self.acceptsArrays = values is not None
+            if self.acceptsArrays:
+                return values
+        return np.vectorize(self.deltaFun, otypes=[float])(*args)
+
+
+def as_vectorized(deltaFun: Callable[..., float]) -> Callable[..., float]:
+    return deltaFun if is_vectorized(deltaFun) else ScalarDelta(deltaFun)
+
+
+class CallDelta:
+    """sign x Black-Scholes call delta, (price, time_to_live) -> delta. The
+    default sign -1 is the position of a maker replicating a short call."""
+
+    vectorized = True
+
+    strike: float
+    volat: float
+    rate: float
+    sign: float
+
+    def __init__(
+        self, strike: float, volat: float, rate: float = 0.0, sign: float = -1.0
+    ) -> None:
+        self.strike = strike
+        self.volat = volat
+        self.rate = rate
+        self.sign = sign
+
+    def __call__(self, x, t):
+        return self.sign * call_delta(x, self.strike, t, self.rate, self.volat)
+
+
+class FixedTtl:
+    """Static curve x -> deltaFun(x, ttl) of a replication delta, e.g. to use a
+    CallDelta with MakerDelta"""
+
+    vectorized = True
+
+    def __init__(self, deltaFun: Callable[[float, float], float], ttl: float):
+        self.deltaFun = as_vectorized(deltaFun)
+        self.ttl = ttl
+
+    def __call__(self, x):
+        return self.deltaFun(x, self.ttl)
+
+
+class ConstantNotional:
+    """Holds a constant notional in asset: delta = notional / x (static curve,
+    time to live is ignored)"""
+
+    vectorized = True
+
+    def __init__(self, notional: float) -> None:
+        self.notional = notional
+
+    def __call__(self, x, t=None):
+        return self.notional / np.asarray(x, dtype=float)[()]
+
+
+class ConstantProduct:
+    """Constant product pool (asset x cash = liquidity^2): delta = liquidity /
+    sqrt(x) (static curve, time to live is ignored)"""
+
+    vectorized = True
+
+    def __init__(self, liquidity: float) -> None:
+        self.liquidity = liquidity
+
+    def __call__(self, x, t=None):
+        return self.liquidity / np.sqrt(np.asarray(x, dtype=float))[()]
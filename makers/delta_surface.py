@@ -0,0 +1,140 @@
+import logging
+from typing import Callable
+import numpy as np
+from makers.delta_functions import evaluate_deltas
+
+
+class DeltaSurface:
+    """A delta function (price, time_to_live) -> delta tabulated once on a
+    (price x ttl) grid, then answered by vectorized bilinear interpolation. It
+    has the deltaFunction signature of MakerReplication, so it can replace the
+    exact function in every maker (and path) sharing the same curve.
+
+    Linear interpolation keeps the curve monotone in price. Ttl nodes are
+    denser close to maturity, where deltas move the most. Prices outside the
+    grid are evaluated with the exact function when it is known (built
+    surfaces), clamped to the grid border otherwise (loaded surfaces)."""
+
+    vectorized = True
+
+    prices: np.ndarray
+    ttls: np.ndarray
+    values: np.ndarray
+    # max interpolation error measured at cell centers (None if unknown)
+    maxError: float
+
+    def __init__(
+        self,
+        prices: np.ndarray,
+        ttls: np.ndarray,
+        values: np.ndarray,
+        deltaFun: Callable[[float, float], float] = None,
+        maxError: float = None,
+    ) -> None:
+        self.prices = np.asarray(prices, dtype=float)
+        self.ttls = np.asarray(ttls, dtype=float)
+        self.values = np.asarray(values, dtype=float)
+        if self.values.shape != (len(self.prices), len(self.ttls)):
+            raise ValueError("values should be a (prices x ttls) grid.")
+        self.deltaFun = deltaFun
+        self.maxError = maxError
+
+    @classmethod
+    def build(
+        cls,
+        deltaFun: Callable[[float, float], float],
+        minPrice: float,
+        maxPrice: float,
+        maxTtl: float,
+        numPrices: int = 201,
+        numTtls: int = 51,
+        tolerance: float = None,
+        maxPoints: int = 4_000_000,
+        minTtl: float = 0.0,
+    ):
+        """Tabulate deltaFun. With a tolerance, the grid is refined (both axes
+        doubled) until the error at cell centers is below tolerance, or the
+        grid would exceed maxPoints (a warning is logged). Option deltas become
+        steps at maturity: use minTtl to keep the last instants exact."""
+        if not 0 < minPrice < maxPrice or not 0 <= minTtl < maxTtl:
+            raise ValueError(
+                "Surface bounds should be 0 < minPrice < maxPrice, "
+                "0 <= minTtl < maxTtl."
+            )
+
+        while True:
+            prices = np.linspace(minPrice, maxPrice, numPrices)
+            ttls = minTtl + (maxTtl - minTtl) * np.linspace(0, 1, numTtls) ** 2
+            values = evaluate_deltas(deltaFun, prices[:, None], ttls[None, :])
+            surface = cls(prices, ttls, values, deltaFun)
+
+            if tolerance is None:
+                return surface
+
+            surface.maxError = surface.max_error(deltaFun)
+            if surface.maxError <= tolerance:
+                return surface
+
+            numPrices, numTtls = 2 * numPrices - 1, 2 * numTtls - 1
+            if numPrices * numTtls > maxPoints:
+                logging.warning(
+                    "DeltaSurface error {:.2e} above tolerance {:.2e}.".format(
+                        surface.maxError, tolerance
+                    )
+                )
+                return surface
+
+    def max_error(self, deltaFun: Callable[[float, float], float]) -> float:
+        """max |surface - deltaFun| on the centers of the grid cells, where the
+        bilinear interpolation error is the largest"""
+        x = 0.5 * (self.prices[1:] + self.prices[:-1])
+        t = 0.5 * (self.ttls[1:] + self.ttls[:-1])
+        exact = evaluate_deltas(deltaFun, x[:, None], t[None, :])
+        return float(np.nanmax(np.abs(self(x[:, None], t[None, :]) - exact)))
+
+    def __call__(self, x, t):
+        x, t = np.broadcast_arrays(np.asarray(x, float), np.asarray(t, float))
+        prices, ttls = self.prices, self.ttls
+
+        xc = np.clip(x, prices[0], prices[-1])
+        tc = np.clip(t, ttls[0], ttls[-1])
+        i = np.clip(np.searchsorted(prices, xc, side="right") - 1, 0, len(prices) - 2)
+        j = np.clip(np.searchsorted(ttls, tc, side="right") - 1, 0, len(ttls) - 2)
+        wx = (xc - prices[i]) / (prices[i + 1] - prices[i])
+        wt = (tc - ttls[j]) / (ttls[j + 1] - ttls[j])
+
+        v = self.values
+        result = np.asarray(
+            (1 - wx) * ((1 - wt) * v[i, j] + wt * v[i, j + 1])
+            + wx * ((1 - wt) * v[i + 1, j] + wt * v[i + 1, j + 1])
+        )
+
+        if self.deltaFun is not None:
+            outside = (x < prices[0]) | (x > prices[-1])
+            outside |= (t < ttls[0]) | (t > ttls[-1])
+            if outside.any():
+                result[outside] = evaluate_deltas(self.deltaFun, x[outside], t[outside])
+
+        return result[()]
+
+    def save(self, filename: str):
+        """Save the grid (npz), e.g. to share one surface between workers"""
+        np.savez(
+            filename,
+            prices=self.prices,
+            ttls=self.ttls,
+            values=self.values,
+            maxError=np.nan if self.maxError is None else self.maxError,
+        )
+
+    @classmethod
+    def load(cls, filename: str, deltaFun: Callable[[float, float], float] = None):
+        with np.load(filename) as data:
+            maxError = float(data["maxError"])
+            return cls(
+                data["prices"],
+                data["ttls"],
+                data["values"],
+                deltaFun,
+                None if np.isnan(maxError) else maxError,
+            )
@@ -1,6 +1,8 @@
 from abc import ABC, abstractmethod
+import copy
 from models.offers_lists import OffersLists
 from models.transaction import Transaction
+from typing import List
 
 
 class Maker(ABC):
@@ -34,6 +36,16 @@ class Maker(ABC):
     def post_hook(self, price: float, time: float):
         pass
 
+    def fast_forward_to_price(self, price: float) -> List[Transaction]:
+        """Take in one go every offer an arbitrageur takes to bring the book to
+        price (the transactions, in order, of the exchange step-by-step loop).
+        None if the maker has no fast path."""
+        return None
+
+    def clone(self) -> "Maker":
+        """Independent copy of the maker in its current state"""
+        return copy.deepcopy(self)
+
     def swap_asset(self, quantity: float, price: float):
         self.asset += quantity
         self.cash -= quantity * price
@@ -0,0 +1,311 @@
+from abc import abstractmethod
+import copy
+import logging
+from models.order import Order, OrderType
+from models.transaction import Transaction, take_maker_order
+from models.offers_lists import OffersLists
+from makers.maker import Maker
+from typing import Dict
+import numpy as np
+
+
+class MakerCurve(Maker):
+    """Common logic of the makers that deposit a ladder of offers from a delta
+    function (MakerDelta, MakerReplication): offers every tickInterval around
+    the mid price, each quantity being the delta change from the previous level.
+
+    Without tickInterval, offers are deployed every tickQuantity of delta
+    instead: the level prices are the inverse of the delta curve at asset +/- k
+    x tickQuantity, found by a vectorized bisection (deltaFun should be
+    decreasing). Levels out of reach of the curve are not deployed.
+
+    With incrementalRequote, the ladder lives on a fixed grid (anchorPrice +
+    j * tickInterval, anchored on the first mid price) and re-quoting the ladder
+    only adds/removes the levels entering/leaving the window and updates the
+    quantities that changed, instead of clearing and re-adding every order. The
+    re-quoting mid price is then rounded to the grid.
+
+    On a book with a price grid (e.g. TickOffersLists), the re-quoting mid
+    price is first rounded to the book tickSize, and tickInterval should be a
+    multiple of it, so that every level of the ladder is on the grid."""
+
+    offersLists: OffersLists
+
+    # (simplification pattern) this is like the mid_price that does not contains
+    # offer. This price will be offered next time the best bid/ask is taken.
+    currentMissingOffer: float
+    lastOffer: float
+
+    numOneWayOffers: int
+    tickInterval: float
+    tickQuantity: float
+
+    incrementalRequote: bool
+    anchorPrice: float
+    # resting orders per grid level index (incremental mode only)
+    levelBids: Dict[int, Order]
+    levelAsks: Dict[int, Order]
+
+    # if True, each fill reposts its quantity on the other side at
+    # currentMissingOffer, so that the ladder stays complete without re-quoting
+    repostFills: bool
+
+    # tickQuantity mode: bisection bracket [mid / PRICE_RANGE, mid * PRICE_RANGE]
+    # and relative precision of the level prices
+    PRICE_RANGE = 2.0**20
+    PRICE_REL_TOL = 1e-12
+
+    def __init__(
+        self,
+        numOneWayOffers: int,
+        tickInterval: float = None,
+        tickQuantity: float = None,
+        incrementalRequote: bool = False,
+        offersLists: OffersLists = None,
+    ) -> None:
+        super().__init__()
+        if not tickInterval and not tickQuantity:
+            raise ValueError("tickInterval or tickQuantity should be given.")
+        if incrementalRequote and not tickInterval:
+            raise ValueError("incrementalRequote requires a tickInterval.")
+        self.numOneWayOffers = numOneWayOffers
+        self.tickInterval = tickInterval
+        self.tickQuantity = tickQuantity
+        self.incrementalRequote = incrementalRequote
+        self.anchorPrice = None
+        self.levelBids = {}
+        self.levelAsks = {}
+        self.currentMissingOffer = None
+        self.lastOffer = None
+        self.repostFills = False
+        self.offersLists = OffersLists() if offersLists is None else offersLists
+        tickSize = self.bookTickSize
+        if tickSize is not None:
+            if not tickInterval:
+                raise ValueError("a book with a tickSize requires a tickInterval.")
+            if abs(tickInterval - round(tickInterval / tickSize) * tickSize) > (
+                1e-7 * tickInterval
+            ):
+                raise ValueError(
+                    "tickInterval {} is not a multiple of the book tickSize {}.".format(
+                        tickInterval, tickSize
+                    )
+                )
+
+    @property
+    def offers(self) -> OffersLists:
+        return self.offersLists
+
+    @property
+    def bookTickSize(self) -> float:
+        """price grid of the book, None if prices are free"""
+        return getattr(self.offersLists, "tickSize", None)
+
+    @property
+    def midPrice(self):
+        bid = self.offersLists.get_best_bid().price
+        ask = self.offersLists.get_best_ask().price
+        return (bid + ask) / 2
+
+    @abstractmethod
+    def computeDelta(self, x: float) -> float:
+        ...
+
+    def clone(self) -> "MakerCurve":
+        """Independent copy of the maker in its current state, e.g. a template
+        maker built once and cloned for every simulated path. Orders are
+        copied with new ids, the delta function (and its cache) is shared."""
+        other = copy.copy(self)
+        other.offersLists = self.offersLists.copy(newIds=True)
+        if self.incrementalRequote:
+            other.levelBids = {
+                int(self._level_of(o.price)): o for o in other.offersLists.ranked_bids
+            }
+            other.levelAsks = {
+                int(self._level_of(o.price)): o for o in other.offersLists.ranked_asks
+            }
+        return other
+
+    def _init_orderbook(self, initMidPrice: float):
+
+        tickSize = self.bookTickSize
+        if tickSize is not None:
+            initMidPrice = round(initMidPrice / tickSize) * tickSize
+
+        # the mid price is the level without offer
+        self.currentMissingOffer = initMidPrice
+        self.lastOffer = None
+
+        if self.incrementalRequote:
+            self._requote_incremental(initMidPrice)
+        else:
+            self._requote_full(initMidPrice)
+
+    def computeDeltas(self, prices: np.ndarray) -> np.ndarray:
+        """computeDelta on an array of prices (override with a vectorized call)"""
+        return np.fromiter(map(self.computeDelta, prices), float, len(prices))
+
+    def _ladder_side(self, prices: np.ndarray, way: int):
+        """(prices, quantities) of the offers kept on one side of the ladder
+        (way -1 bids, +1 asks): quantities are the delta changes from a level to
+        the next, starting from the current asset position."""
+        if way < 0:
+            # prices are decreasing, levels at non positive prices are dropped
+            prices = prices[: np.count_nonzero(prices > 0)]
+        gammas = np.diff(self.computeDeltas(prices), prepend=self.asset)
+        # gamma should be positive on bids, negative on asks because deltaFun
+        # should be decreasing
+        keep = gammas > 0 if way < 0 else gammas < 0
+        return prices[keep], np.abs(gammas[keep])
+
+    def _inverse_deltas(self, targets: np.ndarray, lo: float, hi: float):
+        """prices in [lo, hi] where the decreasing delta curve equals targets
+        (one computeDeltas call per bisection step, in log price), NaN where
+        targets are not bracketed"""
+        bounds = self.computeDeltas(np.array([lo, hi]))
+        bracketed = (targets <= bounds[0]) & (targets >= bounds[1])
+
+        lo = np.full(len(targets), np.log(lo))
+        hi = np.full(len(targets), np.log(hi))
+        tol = np.log1p(self.PRICE_REL_TOL)
+        while np.any(hi - lo > tol):
+            middle = 0.5 * (lo + hi)
+            # the curve is still above target: the level is at a higher price
+            above = self.computeDeltas(np.exp(middle)) > targets
+            lo = np.where(above, middle, lo)
+            hi = np.where(above, hi, middle)
+
+        return np.where(bracketed, np.exp(0.5 * (lo + hi)), np.nan)
+
+    def _quantity_side(self, midPrice: float, way: int):
+        """(prices, quantities) of one side of the tickQuantity ladder"""
+        k = np.arange(1, self.numOneWayOffers + 1)
+        targets = self.asset - way * k * self.tickQuantity
+        if way < 0:
+            prices = self._inverse_deltas(
+                targets, midPrice / self.PRICE_RANGE, midPrice
+            )
+        else:
+            prices = self._inverse_deltas(
+                targets, midPrice, midPrice * self.PRICE_RANGE
+            )
+        # bracketed targets are a prefix of the side (the curve is monotone)
+        prices = prices[: np.count_nonzero(~np.isnan(prices))]
+        return prices, np.full(len(prices), float(self.tickQuantity))
+
+    def _requote_full(self, initMidPrice: float):
+
+        if self.tickInterval:
+            steps = np.arange(1, self.numOneWayOffers + 1) * self.tickInterval
+            bids = self._ladder_side(initMidPrice - steps, -1)
+            asks = self._ladder_side(initMidPrice + steps, 1)
+        else:
+            bids = self._quantity_side(initMidPrice, -1)
+            asks = self._quantity_side(initMidPrice, 1)
+
+        self.offersLists.load_orders(
+            self._side_orders(OrderType.BUY, *bids),
+            self._side_orders(OrderType.SELL, *asks),
+        )
+
+    @staticmethod
+    def _side_orders(way: OrderType, prices: np.ndarray, quantities: np.ndarray):
+        return [Order(way, p, q) for p, q in zip(prices.tolist(), quantities.tolist())]
+
+    # incremental re-quoting ---------------------------------------------------
+
+    def _level_price(self, level: int) -> float:
+        return self.anchorPrice + level * self.tickInterval
+
+    def _level_of(self, price):
+        return np.rint((price - self.anchorPrice) / self.tickInterval).astype(int)
+
+    def _target_levels(self, center: int, way: int) -> Dict[int, float]:
+        """level -> quantity of the ladder side (way -1 bids, +1 asks)"""
+        levels = center + way * np.arange(1, self.numOneWayOffers + 1)
+        prices = self.anchorPrice + levels * self.tickInterval
+        kept, quantities = self._ladder_side(prices, way)
+        return dict(zip(self._level_of(kept).tolist(), quantities.tolist()))
+
+    def _apply_levels(
+        self, current: Dict[int, Order], target: Dict[int, float], way: OrderType
+    ):
+        for level in [level for level in current if level not in target]:
+            self.offersLists.remove_order(current.pop(level))
+
+        for level, quantity in target.items():
+            order = current.get(level)
+            if order is None:
+                order = Order(way, self._level_price(level), quantity)
+                self.offersLists.add_order(order)
+                current[level] = order
+            elif order.quantity != quantity:
+                self.offersLists.set_quantity(order, quantity)
+
+    def _requote_incremental(self, midPrice: float):
+        if self.anchorPrice is None:
+            self.anchorPrice = midPrice
+
+        center = self._level_of(midPrice)
+        self._apply_levels(
+            self.levelBids, self._target_levels(center, -1), OrderType.BUY
+        )
+        self._apply_levels(
+            self.levelAsks, self._target_levels(center, 1), OrderType.SELL
+        )
+
+    def _forget_level(self, levels: Dict[int, Order], order: Order):
+        if self.incrementalRequote:
+            levels.pop(int(self._level_of(order.price)), None)
+
+    def _repost(self, way: OrderType, quantity: float, levels: Dict[int, Order]):
+        """replace liquidity: the missing level is offered with the quantity
+        just taken on the other side"""
+        if not self.repostFills or self.currentMissingOffer is None:
+            return
+        order = Order(way, self.currentMissingOffer, quantity)
+        self.offersLists.add_order(order)
+        if self.incrementalRequote:
+            levels[int(self._level_of(order.price))] = order
+
+    # taker interface ----------------------------------------------------------
+
+    def buy_at_first_rank(self) -> Transaction:
+
+        if not self.offersLists.has_ask():
+            logging.error("No offer available, transaction failed.")
+            return None
+
+        best_ask = self.offersLists.pop_best_ask()
+        self._forget_level(self.levelAsks, best_ask)
+
+        self.cash += best_ask.quantity * best_ask.price
+        self.asset -= best_ask.quantity
+
+        self._repost(OrderType.BUY, best_ask.quantity, self.levelBids)
+
+        # update missing price offer
+        self.currentMissingOffer = best_ask.price
+        self.lastOffer = best_ask.price
+
+        return take_maker_order(best_ask)
+
+    def sell_at_first_rank(self) -> Transaction:
+
+        if not self.offersLists.has_bid():
+            logging.error("No bid available, transaction failed.")
+            return None
+
+        best_bid = self.offersLists.pop_best_bid()
+        self._forget_level(self.levelBids, best_bid)
+
+        self.cash -= best_bid.quantity * best_bid.price
+        self.asset += best_bid.quantity
+
+        self._repost(OrderType.SELL, best_bid.quantity, self.levelAsks)
+
+        # update missing price offer
+        self.currentMissingOffer = best_bid.price
+        self.lastOffer = best_bid.price
+
+        return take_maker_order(best_bid)
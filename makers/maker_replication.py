@@ -1,40 +1,34 @@
-import logging
-from models.order import TOLERANCE, Order, OrderType
-from models.transaction import Transaction, take_maker_order
+from makers.maker_curve import MakerCurve
 from models.offers_lists import OffersLists
-from makers.maker import Maker
+from makers.delta_functions import as_vectorized
+from models.transaction import Transaction
 from typing import Callable
+import numpy as np
 
 
-class MakerReplication(Maker):
+class MakerReplication(MakerCurve):
     """This class implements a maket that deposits offers depending on a
     replication strategy i.e. delta_fun(x, t)."""
 
-    offersLists: OffersLists
-
     # deltafun(price, time_to_live) -> delta
     maturity: float
     ttl: float
     deltaFun: Callable[[float, float], float]
 
-    # (simplification pattern) this is like the mid_price that does not contains
-    # offer. This price will be offered next time the best bid/ask is taken.
-    currentMissingOffer: float
-    lastOffer: float
-
-    numOneWayOffers: int
-    tickInterval: float
-    tickQuantity: float
-
-    @property
-    def offers(self) -> OffersLists:
-        return self.offersLists
-
-    @property
-    def midPrice(self):
-        bid = self.offersLists.get_best_bid().price
-        ask = self.offersLists.get_best_ask().price
-        return (bid + ask) / 2
+    # re-quote policy (all None: re-quote after every fill)
+    requoteTtlThreshold: float
+    requotePriceThreshold: float
+    requoteQuantityTolerance: float
+    # ttl and mid price of the last quote
+    quoteTtl: float
+    quotePrice: float
+    # (prices, deltas at quoteTtl) of each side of the last quote, kept for
+    # requoteQuantityTolerance
+    quoteLadder: list
+    # rebuilds suppressed by the policy after a fill
+    skippedRequotes: int
+    # a fill happened since the last post_hook
+    filled: bool
 
     def updateTime(self, time: float):
         """Update time, to update delta function"""
@@ -44,31 +38,55 @@ class MakerReplication(Maker):
         val = self.deltaFun(x, self.ttl)
         return val
 
-    def _init_orderbook(self, initMidPrice: float, time: float):
+    def computeDeltas(self, prices: np.ndarray) -> np.ndarray:
+        return np.asarray(self.deltaFun(prices, self.ttl), dtype=float)
 
-        self.currentMissingOffer = None
-        self.lastOffer = None
-        self.offersLists.clear()
-
-        delta_prev = self.asset  # self.computeDelta(initMidPrice)
-        for i in range(1, self.numOneWayOffers + 1):
-            price = initMidPrice - float(i) * self.tickInterval
-            delta_current = self.computeDelta(price)
-            gamma = delta_current - delta_prev
-            delta_prev = delta_current
-            # gamma should be positive because deltaFun should be decreasing
-            if (price > 0) and (gamma > 0):
-                self.offersLists.add_order(Order(OrderType.BUY, price, gamma))
-
-        delta_prev = self.asset  # self.computeDelta(initMidPrice)
-        for i in range(1, self.numOneWayOffers + 1):
-            price = initMidPrice + float(i) * self.tickInterval
-            delta_current = self.computeDelta(price)
-            gamma = delta_current - delta_prev
-            delta_prev = delta_current
-            # gamma should be negatgive because deltaFun should be decreasing
-            if gamma < 0:
-                self.offersLists.add_order(Order(OrderType.SELL, price, -gamma))
+    @property
+    def throttled(self) -> bool:
+        return (
+            self.requoteTtlThreshold is not None
+            or self.requotePriceThreshold is not None
+            or self.requoteQuantityTolerance is not None
+        )
+
+    def _init_orderbook(self, initMidPrice: float, time: float):
+        super()._init_orderbook(initMidPrice)
+        self.quoteTtl = self.ttl
+        self.quotePrice = initMidPrice
+        self.quoteLadder = []
+        if self.requoteQuantityTolerance is not None:
+            for side in (self.offersLists.ranked_bids, self.offersLists.ranked_asks):
+                prices = np.array([order.price for order in side])
+                if len(prices):
+                    self.quoteLadder.append((prices, self.computeDeltas(prices)))
+
+    def _quantity_drift(self) -> float:
+        """max change of the quoted quantities if the ladder was re-quoted at
+        the current ttl (same prices, deltas shifted by time): one curve
+        evaluation, against the deltas kept from the quote"""
+        drift = 0.0
+        for prices, deltas in self.quoteLadder:
+            shifts = self.computeDeltas(prices) - deltas
+            drift = max(drift, np.max(np.abs(np.diff(shifts, prepend=0.0))))
+        return drift
+
+    def requote_needed(self, price: float) -> bool:
+        if not self.throttled:
+            return True
+        if (
+            self.requoteTtlThreshold is not None
+            and self.quoteTtl - self.ttl >= self.requoteTtlThreshold
+        ):
+            return True
+        if (
+            self.requotePriceThreshold is not None
+            and abs(price - self.quotePrice) >= self.requotePriceThreshold
+        ):
+            return True
+        return (
+            self.requoteQuantityTolerance is not None
+            and self._quantity_drift() > self.requoteQuantityTolerance
+        )
 
     def __init__(
         self,
@@ -78,72 +96,61 @@ class MakerReplication(Maker):
         numOneWayOffers: int,
         tickInterval: float = None,
         tickQuantity: float = None,
+        incrementalRequote: bool = False,
+        offersLists: OffersLists = None,
+        requoteTtlThreshold: float = None,
+        requotePriceThreshold: float = None,
+        requoteQuantityTolerance: float = None,
     ):
         """
-        initMidPrice    : first orderbook to setup
-        deltaFunction   : (price, time_to_live) -> delta
-        maturity        : maturity of the replication strategy
-        numOneWayOffers : the number of offers to deposit on way (bids = asks)
-        tickInterval    : if not None, offers will deployed every tickInterval x minTickSize
-        tickQuantity    : if not None, offers will be deployed at prices that require delta adjustment of tickQuantity
+        initMidPrice       : first orderbook to setup
+        deltaFunction      : (price, time_to_live) -> delta, vectorized or scalar (see delta_functions)
+        maturity           : maturity of the replication strategy
+        numOneWayOffers    : the number of offers to deposit on way (bids = asks)
+        tickInterval       : if not None, offers will deployed every tickInterval x minTickSize
+        tickQuantity       : if not None, offers will be deployed at prices that require delta adjustment of tickQuantity
+        incrementalRequote : if True, re-quoting only updates the levels that changed (see MakerCurve)
+        offersLists        : the book to fill, a new OffersLists by default (e.g. a TickOffersLists)
+        requoteTtlThreshold      : if not None, re-quote once ttl decreased by this since the last quote
+        requotePriceThreshold    : if not None, re-quote once price moved by this since the last quote
+        requoteQuantityTolerance : if not None, re-quote once a resting quantity is off by more than this
+
+        If any requote* is given, fills do not trigger a re-quote by themselves
+        (see skippedRequotes): the taken liquidity is reposted on the other
+        side, and the ladder is rebuilt when a threshold is crossed.
         """
-        super().__init__()
+        super().__init__(
+            numOneWayOffers, tickInterval, tickQuantity, incrementalRequote, offersLists
+        )
         initMidPrice = float(initMidPrice)
-        self.deltaFun = deltaFunction
+        self.deltaFun = as_vectorized(deltaFunction)
         self.maturity = maturity
-        self.numOneWayOffers = numOneWayOffers
-        self.tickInterval = tickInterval
-        self.tickQuantity = tickQuantity
-        self.offersLists = OffersLists()
+        self.requoteTtlThreshold = requoteTtlThreshold
+        self.requotePriceThreshold = requotePriceThreshold
+        self.requoteQuantityTolerance = requoteQuantityTolerance
+        self.repostFills = self.throttled
+        self.skippedRequotes = 0
+        self.filled = False
         self.updateTime(0)
         self.swap_asset(self.computeDelta(initMidPrice), initMidPrice)
         self._init_orderbook(initMidPrice, 0)
 
     def buy_at_first_rank(self) -> Transaction:
-
-        if not self.offersLists.has_ask():
-            logging.error("No offer available, transaction failed.")
-            return None
-
-        best_ask = self.offersLists.pop_best_ask()
-
-        self.cash += best_ask.quantity * best_ask.price
-        self.asset -= best_ask.quantity
-
-        # # replace liquidity
-        # self.offersLists.ranked_bids.add(
-        #     Order(OrderType.BUY, self.currentMissingOffer, best_ask.quantity)
-        # )
-
-        # update missing price offer
-        self.currentMissingOffer = best_ask.price
-        self.lastOffer = best_ask.price
-
-        return take_maker_order(best_ask)
+        transaction = super().buy_at_first_rank()
+        self.filled = self.filled or transaction is not None
+        return transaction
 
     def sell_at_first_rank(self) -> Transaction:
-
-        if not self.offersLists.has_bid():
-            logging.error("No bid available, transaction failed.")
-            return None
-
-        best_bid = self.offersLists.pop_best_bid()
-
-        self.cash -= best_bid.quantity * best_bid.price
-        self.asset += best_bid.quantity
-
-        # # replace liquidity
-        # self.offersLists.ranked_asks.add(
-        #     Order(OrderType.SELL, self.currentMissingOffer, best_bid.quantity)
-        # )
-
-        # update missing price offer
-        self.currentMissingOffer = best_bid.price
-        self.lastOffer = best_bid.price
-
-        return take_maker_order(best_bid)
+        transaction = super().sell_at_first_rank()
+        self.filled = self.filled or transaction is not None
+        return transaction
 
     def post_hook(self, price: float, time: float):
+        filled, self.filled = self.filled, False
         if self.lastOffer:
             self.updateTime(time)
-            self._init_orderbook(price, time)
+            if self.requote_needed(price):
+                self._init_orderbook(price, time)
+            elif filled:
+                # lastOffer is kept: the policy is checked again next step
+                self.skippedRequotes += 1
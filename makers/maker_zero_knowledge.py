@@ -1,9 +1,13 @@
-from cmath import isclose
+from math import isclose
+import copy
 import logging
 from models.order import TOLERANCE, Order, OrderType
 from models.transaction import Transaction, take_maker_order
 from models.offers_lists import OffersLists
+from models.orderbook import price_to_tick
 from makers.maker import Maker
+from typing import List
+import numpy as np
 
 
 def _round_tick_size(val: float, tick: float) -> float:
@@ -29,6 +33,12 @@ class MakerZeroKnowledge(Maker):
         ask = self.offersLists.get_best_ask().price
         return (bid + ask) / 2
 
+    def clone(self) -> "MakerZeroKnowledge":
+        """Independent copy of the maker in its current state"""
+        other = copy.copy(self)
+        other.offersLists = self.offersLists.copy(newIds=True)
+        return other
+
     def _init_orderbook(
         self,
         initMidPrice: float,
@@ -40,7 +50,7 @@ class MakerZeroKnowledge(Maker):
     ):
         self.tickSize = tickSize
 
-        self.offersLists = OffersLists()
+        self.offersLists.clear()
 
         midPrice = _round_tick_size(initMidPrice, self.tickSize)
 
@@ -61,6 +71,7 @@ class MakerZeroKnowledge(Maker):
         sizeBid: float,
         numOffers: int,
         sizeOffer: float,
+        offersLists: OffersLists = None,
     ):
         """
         initMidPrice : starting price to count ticks and deposit offers. No offer on this price.
@@ -68,12 +79,20 @@ class MakerZeroKnowledge(Maker):
         sizeBids     : the size of the bid offers
         numAsks      : the number of asks that will be deposited
         sizeAsk      : the size of the ask offers
+        offersLists  : the book to fill, a new OffersLists by default (e.g. a TickOffersLists)
         """
         super().__init__()
+        self.offersLists = OffersLists() if offersLists is None else offersLists
         self._init_orderbook(
             initMidPrice, tickSize, numBids, sizeBid, numOffers, sizeOffer
         )
 
+    def _same_tick(self, price: float, other: float) -> bool:
+        # prices are on the tick grid: exact integer comparison
+        return price_to_tick(price, self.tickSize) == price_to_tick(
+            other, self.tickSize
+        )
+
     def buy_at_first_rank(self) -> Transaction:
 
         if not self.offersLists.has_ask():
@@ -92,11 +111,11 @@ class MakerZeroKnowledge(Maker):
 
         best_bid = self.offersLists.get_best_bid()
 
-        if best_bid and isclose(best_bid.price, new_price, rel_tol=TOLERANCE):
-            best_bid.quantity += incr_quantity
+        if best_bid and self._same_tick(best_bid.price, new_price):
+            self.offersLists.increase_quantity(best_bid, incr_quantity)
         else:
             new_bid = Order(OrderType.BUY, new_price, incr_quantity)
-            self.offersLists.ranked_bids.add(new_bid)
+            self.offersLists.add_order(new_bid)
 
         return tx
 
@@ -116,15 +135,81 @@ class MakerZeroKnowledge(Maker):
         incr_quantity = best_bid.quantity * best_bid.price / new_price
 
         best_offer = self.offersLists.get_best_ask()
-        if best_offer and isclose(best_offer.price, new_price, rel_tol=TOLERANCE):
-            best_offer.quantity += incr_quantity
+        if best_offer and self._same_tick(best_offer.price, new_price):
+            self.offersLists.increase_quantity(best_offer, incr_quantity)
         else:
             new_offer = Order(OrderType.SELL, new_price, incr_quantity)
-            self.offersLists.ranked_asks.add(new_offer)
+            self.offersLists.add_order(new_offer)
 
         tx = take_maker_order(best_bid)
 
         return tx
 
+    def fast_forward_to_price(self, price: float) -> List[Transaction]:
+        """Closed form of a jump over k levels: the k best offers are taken
+        at once, cash and asset are accumulated with cumsum (same sequential
+        sums as k single takes) and the k redeployed orders are bulk inserted.
+        Only the first one can merge with the best order of the other side,
+        the next ones are all at better prices. None on degenerate ladders
+        (several levels on a tick) and array books, left to the step-by-step
+        path."""
+        if not isinstance(self.offersLists, OffersLists):
+            return None
+
+        asks = self.offersLists.ranked_asks
+        bids = self.offersLists.ranked_bids
+
+        numTaken = asks.bisect_right(Order(OrderType.SELL, price, 1))
+        if numTaken:
+            return self._fast_take(asks, bids, numTaken, price, OrderType.BUY)
+        numTaken = bids.bisect_right(Order(OrderType.BUY, price, 1))
+        if numTaken:
+            return self._fast_take(bids, asks, numTaken, price, OrderType.SELL)
+        return []
+
+    def _fast_take(self, taken, other, numTaken: int, price: float, way: OrderType):
+        orders = taken[:numTaken]
+        prices = np.array([o.price for o in orders])
+        quantities = np.array([o.quantity for o in orders])
+
+        # the arbitrageur stops on the first level at price: the price is
+        # matched to the grid once, levels are compared by tick
+        ticks = np.rint(prices / self.tickSize).astype(int)
+        priceTick = price_to_tick(price, self.tickSize)
+        if isclose(priceTick * self.tickSize, price, rel_tol=TOLERANCE):
+            atPrice = ticks == priceTick
+            if atPrice.any():
+                numTaken = int(np.argmax(atPrice)) + 1
+                orders = orders[:numTaken]
+                prices, quantities = prices[:numTaken], quantities[:numTaken]
+                ticks = ticks[:numTaken]
+
+        # levels sharing a tick would merge their redeployed orders
+        if numTaken > 1 and (np.diff(ticks) == 0).any():
+            return None
+
+        # taking asks redeploys bids one tick below, and conversely
+        step = -self.tickSize if way == OrderType.BUY else self.tickSize
+        newPrices = prices + step
+
+        notionals = quantities * prices
+        sign = 1 if way == OrderType.BUY else -1
+        self.cash = np.cumsum(np.append(self.cash, sign * notionals))[-1].item()
+        self.asset = np.cumsum(np.append(self.asset, -sign * quantities))[-1].item()
+        del taken[:numTaken]
+
+        incrQuantities = (notionals / newPrices).tolist()
+        newPrices = newPrices.tolist()
+        best = other[0] if other else None
+        if best and self._same_tick(best.price, newPrices[0]):
+            best.quantity += incrQuantities[0]
+            newPrices, incrQuantities = newPrices[1:], incrQuantities[1:]
+        other.update(Order(way, p, q) for p, q in zip(newPrices, incrQuantities))
+        # the ranked lists were changed in place
+        self.offersLists.touch()
+        self.offersLists.drop_changes()
+
+        return [take_maker_order(o) for o in orders]
+
     def post_hook(self, price: float, time: float):
         return super().post_hook(price, time)
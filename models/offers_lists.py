@@ -1,25 +1,135 @@
-from models.order import Order, OrderType
+from models.order import TOLERANCE, Order, OrderType, new_id
 from sortedcontainers import SortedList
+import copy
 import logging
-from typing import List
+from typing import List, Tuple
+import numpy as np
 
 # from math import isclose
 
 
+class DepthIndex:
+    """Prefix sums of quantity and notional over one side of a book, best
+    first, for price impact queries by binary search. Taking the best orders
+    only moves the offset: the sums stay valid until another change."""
+
+    # +1 on asks (increasing prices), -1 on bids
+    sign: int
+    prices: np.ndarray
+    # cumulated quantity / notional of the levels before each index
+    cumQuantity: np.ndarray
+    cumNotional: np.ndarray
+    # number of levels taken since the sums were built
+    offset: int
+    # version of the side the sums describe
+    version: int
+
+    def __init__(self, prices, quantities, sign: int, version: int) -> None:
+        self.sign = sign
+        self.prices = np.asarray(prices, dtype=float)
+        quantities = np.asarray(quantities, dtype=float)
+        self.cumQuantity = np.concatenate([[0.0], np.cumsum(quantities)])
+        self.cumNotional = np.concatenate([[0.0], np.cumsum(quantities * self.prices)])
+        self.offset = 0
+        self.version = version
+
+    def skip_best(self, version: int):
+        """The best level was taken from the side at version: an index up to
+        date stays valid by moving its offset"""
+        if self.version == version:
+            self.offset += 1
+            self.version = version + 1
+
+    def orders_to_price(self, price: float) -> int:
+        """number of levels at price or better for the taker (asks <= price,
+        bids >= price)"""
+        ranks = self.sign * self.prices[self.offset :]
+        return int(np.searchsorted(ranks, self.sign * price, "right"))
+
+    def depth_to_price(self, price: float) -> Tuple[float, float]:
+        """(quantity, notional) of the levels at price or better for the
+        taker"""
+        n = self.offset + self.orders_to_price(price)
+        return (
+            float(self.cumQuantity[n] - self.cumQuantity[self.offset]),
+            float(self.cumNotional[n] - self.cumNotional[self.offset]),
+        )
+
+    def price_for_depth(self, quantity: float) -> Tuple[float, float]:
+        """(price of the last level reached, average price) of a sweep of
+        quantity, None if the side is not deep enough"""
+        if quantity <= 0:
+            raise ValueError("quantity should be positive.")
+        start = self.cumQuantity[self.offset]
+        target = start + quantity
+        if target > self.cumQuantity[-1] * (1 + TOLERANCE):
+            return None
+        i = min(
+            int(np.searchsorted(self.cumQuantity, target, "left")),
+            len(self.cumQuantity) - 1,
+        )
+        # the last level reached is only partially taken
+        notional = self.cumNotional[i - 1] - self.cumNotional[self.offset]
+        notional += (target - self.cumQuantity[i - 1]) * self.prices[i - 1]
+        return float(self.prices[i - 1]), float(notional / quantity)
+
+
 class OffersLists:
 
     ranked_bids: SortedList
     ranked_asks: SortedList
 
+    # change counters of each side, the depth indexes are rebuilt lazily when
+    # they do not match
+    bidsVersion: int
+    asksVersion: int
+    # log of the orders added (order id, order) and removed (order id, None)
+    # since the last pop_changes, None while nobody follows it
+    changes: list
+
     @property
     def midPrice(self):
-        bid = self.orderBook.get_best_bid().price
-        ask = self.orderBook.get_best_ask().price
+        bid = self.get_best_bid().price
+        ask = self.get_best_ask().price
         return (bid + ask) / 2
 
     def __init__(self) -> None:
         self.ranked_bids = SortedList()
         self.ranked_asks = SortedList()
+        self.bidsVersion = 0
+        self.asksVersion = 0
+        self._bidsDepth = None
+        self._asksDepth = None
+        self.changes = None
+
+    @property
+    def version(self) -> int:
+        """Increases on every change of the lists"""
+        return self.bidsVersion + self.asksVersion
+
+    def touch(self, orderType: OrderType = None):
+        """Record a change of a side (both by default) made directly on the
+        ranked lists or on resting orders"""
+        if orderType != OrderType.SELL:
+            self.bidsVersion += 1
+        if orderType != OrderType.BUY:
+            self.asksVersion += 1
+
+    def _record(self, orderId: int, order: Order):
+        if self.changes is not None:
+            self.changes.append((orderId, order))
+
+    def pop_changes(self) -> list:
+        """Orders added (order id, order) and removed (order id, None) since
+        the last call, (None, None) when the lists were cleared. None on the
+        first call, and after changes made directly on the ranked lists (see
+        drop_changes): the caller should then read the whole lists."""
+        changes, self.changes = self.changes, []
+        return changes
+
+    def drop_changes(self):
+        """The ranked lists were changed in place, without a log"""
+        self.changes = None
 
     def __str__(self) -> str:
 
@@ -53,6 +163,89 @@ class OffersLists:
             self.ranked_asks.add(order)
         else:
             logging.info("Order type not recognized, nothing pushed.")
+            return
+        self.touch(order.order_type)
+        self._record(order.id, order)
+
+    def load_orders(self, bids: List[Order], asks: List[Order]):
+        """Replace both sides in one go (a single sort per side)"""
+        self.clear()
+        self.ranked_bids.update(bids)
+        self.ranked_asks.update(asks)
+        if self.changes is not None:
+            self.changes.extend((o.id, o) for o in self.ranked_bids)
+            self.changes.extend((o.id, o) for o in self.ranked_asks)
+
+    def copy(self, newIds: bool = False) -> "OffersLists":
+        """Copy of both sides, with copied orders (quantities are mutable).
+        With newIds, the copied orders are new orders (new ids), e.g. for
+        makers cloned from one template that meet on an exchange."""
+        bids = list(map(copy.copy, self.ranked_bids))
+        asks = list(map(copy.copy, self.ranked_asks))
+        if newIds:
+            for order in bids + asks:
+                order.id = new_id()
+                order._uuid = None
+        other = OffersLists()
+        # already ranked: the sort is a single linear pass
+        other.ranked_bids = SortedList(bids)
+        other.ranked_asks = SortedList(asks)
+        return other
+
+    def remove_order(self, order: Order):
+        """Remove a resting order (ValueError if not in the lists)"""
+        if order.order_type == OrderType.BUY:
+            self.ranked_bids.remove(order)
+        else:
+            self.ranked_asks.remove(order)
+        self.touch(order.order_type)
+        self._record(order.id, None)
+
+    def set_quantity(self, order: Order, quantity: float):
+        """Change the quantity of a resting order in place (ranking only
+        depends on price)"""
+        order.quantity = quantity
+        self.touch(order.order_type)
+
+    def increase_quantity(self, order: Order, quantity: float):
+        """Merge quantity into a resting order"""
+        self.set_quantity(order, order.quantity + quantity)
+
+    # depth index --------------------------------------------------------------
+
+    def _depth(self, orderType: OrderType) -> DepthIndex:
+        if orderType == OrderType.BUY:
+            index, orders, version = self._bidsDepth, self.ranked_bids, self.bidsVersion
+        else:
+            index, orders, version = self._asksDepth, self.ranked_asks, self.asksVersion
+        if index is None or index.version != version:
+            index = DepthIndex(
+                [o.price for o in orders],
+                [o.quantity for o in orders],
+                -1 if orderType == OrderType.BUY else 1,
+                version,
+            )
+            if orderType == OrderType.BUY:
+                self._bidsDepth = index
+            else:
+                self._asksDepth = index
+        return index
+
+    def orders_to_price(self, orderType: OrderType, price: float) -> int:
+        """number of orders of a side (bids for BUY) a sweep up to price takes"""
+        return self._depth(orderType).orders_to_price(price)
+
+    def depth_to_price(self, orderType: OrderType, price: float) -> Tuple[float, float]:
+        """(quantity, notional) resting on a side (bids for BUY) at price or
+        better for a taker, i.e. what a sweep up to price takes"""
+        return self._depth(orderType).depth_to_price(price)
+
+    def price_for_depth(
+        self, orderType: OrderType, quantity: float
+    ) -> Tuple[float, float]:
+        """(last price, average price) of a sweep of quantity on a side, None
+        if the side is not deep enough"""
+        return self._depth(orderType).price_for_depth(quantity)
 
     def has_bid(self) -> bool:
         return len(self.ranked_bids) > 0
@@ -73,11 +266,24 @@ class OffersLists:
             return None
 
     def pop_best_bid(self) -> Order:
-        return self.ranked_bids.pop(0)
+        order = self.ranked_bids.pop(0)
+        if self._bidsDepth is not None:
+            self._bidsDepth.skip_best(self.bidsVersion)
+        self.bidsVersion += 1
+        self._record(order.id, None)
+        return order
 
     def pop_best_ask(self) -> Order:
-        return self.ranked_asks.pop(0)
+        order = self.ranked_asks.pop(0)
+        if self._asksDepth is not None:
+            self._asksDepth.skip_best(self.asksVersion)
+        self.asksVersion += 1
+        self._record(order.id, None)
+        return order
 
     def clear(self):
         self.ranked_bids.clear()
         self.ranked_asks.clear()
+        self.touch()
+        if self.changes is not None:
+            self.changes = [(None, None)]
@@ -1,6 +1,6 @@
 from enum import Enum
+import itertools
 import uuid
-from math import isclose
 from functools import total_ordering
 
 TOLERANCE = 1E-7
@@ -14,11 +14,23 @@ class OrderType(Enum):
         return self.name
 
 
+_ids = itertools.count()
+
+
+def new_id() -> int:
+    """Process-wide increasing id of orders and transactions (cheaper than
+    uuid4, which reads os.urandom)"""
+    return next(_ids)
+
+
 @total_ordering
 class Order():
 
+    __slots__ = ("id", "order_type", "price", "quantity", "_uuid")
+
     def __init__(self, orderType: OrderType, price: float, quantity: float) -> None:
-        self.uuid = uuid.uuid4()
+        self.id = next(_ids)
+        self._uuid = None
 
         self.order_type = orderType
         if price <= 0 or quantity <= 0:
@@ -26,6 +38,13 @@ class Order():
         self.price = price
         self.quantity = quantity
 
+    @property
+    def uuid(self) -> uuid.UUID:
+        """Random UUID, only drawn when asked for"""
+        if self._uuid is None:
+            self._uuid = uuid.uuid4()
+        return self._uuid
+
     def __str__(self) -> str:
         return "{type} {quantity}@{price}".format(
             type=self.order_type,
@@ -34,15 +53,17 @@ class Order():
         )
 
     def __eq__(self, obj):
-        return isinstance(obj, Order) and obj.order_type == self.order_type \
-            and isclose(obj.price, self.price, rel_tol=TOLERANCE) \
-            and isclose(obj.quantity, self.quantity, rel_tol=TOLERANCE) \
-            and obj.uuid == self.uuid
+        # ids are unique: copies of an order (same id) are equal to it
+        return isinstance(obj, Order) and obj.id == self.id
 
     def __lt__(self, obj):
         if not isinstance(obj, Order):
             return False
-        if self.order_type == obj.order_type:
-            return (self.price < obj.price) ^ (self.order_type == OrderType.BUY)
+        if self.order_type is obj.order_type:
+            # strict on both sides (bids by decreasing price): equal prices keep
+            # their insertion order and can be located by bisection
+            if self.order_type is OrderType.BUY:
+                return self.price > obj.price
+            return self.price < obj.price
         else:
             return (self.price < obj.price)
@@ -1,21 +1,44 @@
 from models.order import Order, OrderType
+from collections import deque
 import logging
-from typing import List
+from typing import Deque, List
 from math import isclose
+from sortedcontainers import SortedDict
+
+
+def price_to_tick(price: float, tickSize: float) -> int:
+    return int(round(price / tickSize))
+
+
+def tick_to_price(tick: int, tickSize: float) -> float:
+    return tick * tickSize
 
 
 class OrderBook:
+    """Book of prices in integer ticks: each side maps a tick to the queue of
+    its orders (time priority inside a level). Prices are converted to ticks
+    once, when an order enters the book, and back to floats on the way out, so
+    ranking and level matching are exact integer operations."""
+
     tickSize: float
-    ranked_bids: List[Order] = []
-    ranked_asks: List[Order] = []
+    bids: SortedDict
+    asks: SortedDict
 
     def __init__(self, tickSize: float) -> None:
         if tickSize <= 0:
             raise (ValueError("tickSize should be positive."))
 
         self.tickSize = tickSize
-        self.ranked_bids = []
-        self.ranked_asks = []
+        # tickSize of another grid -> ratio of the ticks (see _tick_ratio)
+        self._tickRatios = {}
+        self.bids = SortedDict()
+        self.asks = SortedDict()
+
+    @property
+    def midPrice(self):
+        bid = self.get_best_bid().price
+        ask = self.get_best_ask().price
+        return (bid + ask) / 2
 
     def __str__(self) -> str:
 
@@ -29,9 +52,10 @@ class OrderBook:
         result += header_template.format("Qty Bid", "Px Bid", "Px Ask", "Qty Ask")
         result += hline
 
-        for i in range(0, min([5, max(len(self.ranked_bids), len(self.ranked_asks))])):
-            bid = self.ranked_bids[i] if len(self.ranked_bids) > i else None
-            ask = self.ranked_asks[i] if len(self.ranked_asks) > i else None
+        ranked_bids, ranked_asks = self.ranked_bids, self.ranked_asks
+        for i in range(0, min([5, max(len(ranked_bids), len(ranked_asks))])):
+            bid = ranked_bids[i] if len(ranked_bids) > i else None
+            ask = ranked_asks[i] if len(ranked_asks) > i else None
             result += info_template.format(
                 "{:.5f}".format(bid.quantity) if bid else "",
                 "{:.5f}".format(bid.price) if bid else "",
@@ -41,72 +65,165 @@ class OrderBook:
 
         return result
 
-    def append_maker_order(self, order: Order):
-        ticked_price = round(order.price / self.tickSize, 0) * self.tickSize
-        if not isclose(order.price, ticked_price, rel_tol=1e-7):
+    def price_to_tick(self, price: float) -> int:
+        return price_to_tick(price, self.tickSize)
+
+    def tick_to_price(self, tick: int) -> float:
+        return tick_to_price(tick, self.tickSize)
+
+    def _side(self, orderType: OrderType) -> SortedDict:
+        return self.bids if orderType == OrderType.BUY else self.asks
+
+    def _tick_ratio(self, tickSize: float) -> int:
+        """number of ticks of the book in a tick of another grid, None if it
+        is not a whole number (computed once per grid)"""
+        ratio = self._tickRatios.get(tickSize, 0)
+        if ratio == 0:
+            ratio = int(round(tickSize / self.tickSize))
+            if ratio < 1 or not isclose(ratio * self.tickSize, tickSize, rel_tol=1e-7):
+                ratio = None
+            self._tickRatios[tickSize] = ratio
+        return ratio
+
+    def _ticked(self, order: Order) -> int:
+        """tick of the order, None (logged) if its price is not on the grid.
+        Orders are not modified: the tick only lives in the book, as the key
+        of the level. Levels of a TickOffersLists carry their integer tick:
+        only the ratio of the two grids is checked."""
+        tick = getattr(order, "tick", None)
+        if tick is not None:
+            ratio = self._tick_ratio(order.book.tickSize)
+            if ratio is None:
+                logging.error("Trying to push order with wrong tickSize.")
+                return None
+            return tick * ratio
+
+        tick = self.price_to_tick(order.price)
+        if not isclose(order.price, self.tick_to_price(tick), rel_tol=1e-7):
             logging.error("Trying to push order with wrong tickSize.")
+            return None
+        return tick
+
+    def add_order(self, order: Order) -> int:
+        """Queue the order at the back of its level, returns its tick (None if
+        refused)"""
+        if order.order_type not in (OrderType.BUY, OrderType.SELL):
+            logging.info("Order type not recognized, nothing pushed.")
+            return None
+        tick = self._ticked(order)
+        if tick is None:
+            return None
+        side = self._side(order.order_type)
+        level = side.get(tick)
+        if level is None:
+            level = side[tick] = deque()
+        level.append(order)
+        return tick
+
+    def append_maker_order(self, order: Order):
+        """add_order for a maker deploying its ladder from the best level:
+        raises if the order would rank before the current worst one"""
+        tick = self._ticked(order)
+        if tick is None:
             return
-        order.price = ticked_price
 
         if order.order_type == OrderType.BUY:
-            if self.has_bid():
-                if self.ranked_bids[-1].price < order.price:
-                    logging.error(
-                        "can't append a bid at {0}, there is a worst bid".format(
-                            order.price
-                        )
+            if self.has_bid() and self.bids.peekitem(0)[0] < tick:
+                logging.error(
+                    "can't append a bid at {0}, there is a worst bid".format(
+                        order.price
                     )
-                    raise Exception()
-
-            self.ranked_bids.append(order)
+                )
+                raise Exception()
 
         elif order.order_type == OrderType.SELL:
-            if self.has_ask():
-                if order.price < self.ranked_asks[-1].price:
-                    logging.error(
-                        "can't append an ask at {0}, there is a worst ask".format(
-                            order.price
-                        )
+            if self.has_ask() and tick < self.asks.peekitem(-1)[0]:
+                logging.error(
+                    "can't append an ask at {0}, there is a worst ask".format(
+                        order.price
                     )
-                    raise Exception()
-
-            self.ranked_asks.append(order)
-
-        else:
-            logging.info("Order type not recognized, nothing pushed.")
+                )
+                raise Exception()
+
+        self.add_order(order)
+
+    def remove_order(self, order: Order, tick: int = None):
+        """Remove a resting order (ValueError if not in the book), tick is the
+        one returned by add_order (found again by _ticked if None)"""
+        side = self._side(order.order_type)
+        if tick is None:
+            tick = self._ticked(order)
+        level = side.get(tick)
+        if level is None:
+            raise ValueError("{} not in book".format(order))
+        level.remove(order)
+        if not level:
+            del side[tick]
+
+    @property
+    def ranked_bids(self) -> List[Order]:
+        return [order for level in reversed(self.bids.values()) for order in level]
+
+    @property
+    def ranked_asks(self) -> List[Order]:
+        return [order for level in self.asks.values() for order in level]
 
     def has_bid(self) -> bool:
-        return len(self.ranked_bids) > 0
+        return len(self.bids) > 0
 
     def has_ask(self) -> bool:
-        return len(self.ranked_asks) > 0
+        return len(self.asks) > 0
+
+    def best_bid_tick(self) -> int:
+        return self.bids.peekitem(-1)[0] if self.bids else None
+
+    def best_ask_tick(self) -> int:
+        return self.asks.peekitem(0)[0] if self.asks else None
+
+    def best_bid_level(self) -> Deque[Order]:
+        return self.bids.peekitem(-1)[1] if self.bids else None
+
+    def best_ask_level(self) -> Deque[Order]:
+        return self.asks.peekitem(0)[1] if self.asks else None
 
     def get_best_bid(self) -> Order:
         if self.has_bid():
-            return self.ranked_bids[0]
+            return self.bids.peekitem(-1)[1][0]
         else:
             return None
 
     def get_best_ask(self) -> Order:
         if self.has_ask():
-            return self.ranked_asks[0]
+            return self.asks.peekitem(0)[1][0]
         else:
             return None
 
     def get_worst_bid(self) -> Order:
         if self.has_bid():
-            return self.ranked_bids[-1]
+            return self.bids.peekitem(0)[1][-1]
         else:
             return None
 
     def get_worst_ask(self) -> Order:
         if self.has_ask():
-            return self.ranked_asks[-1]
+            return self.asks.peekitem(-1)[1][-1]
         else:
             return None
 
     def pop_best_bid(self) -> Order:
-        return self.ranked_bids.pop(0)
+        tick, level = self.bids.peekitem(-1)
+        order = level.popleft()
+        if not level:
+            del self.bids[tick]
+        return order
 
     def pop_best_ask(self) -> Order:
-        return self.ranked_asks.pop(0)
+        tick, level = self.asks.peekitem(0)
+        order = level.popleft()
+        if not level:
+            del self.asks[tick]
+        return order
+
+    def clear(self):
+        self.bids.clear()
+        self.asks.clear()
@@ -0,0 +1,351 @@
+from models.order import Order, OrderType, new_id
+from models.offers_lists import DepthIndex, OffersLists
+import uuid
+from typing import List
+import numpy as np
+
+
+class TickLevel:
+    """View on a price level of a TickOffersLists, with the attributes of an
+    Order: setting quantity writes into the book."""
+
+    def __init__(self, book: "TickOffersLists", orderType: OrderType, tick: int):
+        self.book = book
+        self.order_type = orderType
+        # absolute tick: views stay valid when the book arrays grow
+        self.tick = tick
+        # a level keeps its id while it rests, a refilled level gets a new one
+        self.id = book._level_id(orderType, tick)
+        self._uuid = None
+
+    @property
+    def price(self) -> float:
+        return self.tick * self.book.tickSize
+
+    @property
+    def quantity(self) -> float:
+        return float(self.book._side(self.order_type)[self.tick - self.book.baseTick])
+
+    @quantity.setter
+    def quantity(self, value: float):
+        self.book._side(self.order_type)[self.tick - self.book.baseTick] = value
+        self.book.touch(self.order_type)
+
+    @property
+    def uuid(self):
+        if self._uuid is None:
+            self._uuid = uuid.uuid4()
+        return self._uuid
+
+    def __str__(self) -> str:
+        return "{type} {quantity}@{price}".format(
+            type=self.order_type, quantity=self.quantity, price=self.price
+        )
+
+
+class TickOffersLists:
+    """Price-level book with the OffersLists interface: quantities are stored
+    in two numpy arrays indexed by integer tick (price / tickSize, rounded), so
+    adding, merging and taking liquidity are array writes. Orders at the same
+    tick are merged into one level. The arrays are anchored on the first order
+    added after a clear and grow when prices leave them. Prices should be on the
+    tickSize grid: off-grid prices raise a ValueError instead of being snapped.
+
+    Best levels are returned as TickLevel views, popped levels as Orders.
+    ranked_bids / ranked_asks are snapshots (lists of views, best first)."""
+
+    tickSize: float
+    # tick of index 0 (None while the book is empty after a clear)
+    baseTick: int
+    bids: np.ndarray
+    asks: np.ndarray
+    # index of the best levels, -1 if the side is empty
+    bestBid: int
+    bestAsk: int
+    # change counters, as in OffersLists
+    bidsVersion: int
+    asksVersion: int
+
+    def __init__(self, tickSize: float, capacity: int = 1024) -> None:
+        if tickSize <= 0 or capacity <= 0:
+            raise ValueError("tickSize and capacity should be positive.")
+        self.tickSize = tickSize
+        self.baseTick = None
+        self.bids = np.zeros(capacity)
+        self.asks = np.zeros(capacity)
+        self.bestBid = -1
+        self.bestAsk = -1
+        self.bidsVersion = 0
+        self.asksVersion = 0
+        self._bidsDepth = None
+        self._asksDepth = None
+        self._levelIds = {}
+        self.changes = None
+
+    __str__ = OffersLists.__str__
+    version = OffersLists.version
+    touch = OffersLists.touch
+    increase_quantity = OffersLists.increase_quantity
+    orders_to_price = OffersLists.orders_to_price
+    depth_to_price = OffersLists.depth_to_price
+    price_for_depth = OffersLists.price_for_depth
+    _record = OffersLists._record
+    pop_changes = OffersLists.pop_changes
+    drop_changes = OffersLists.drop_changes
+
+    @property
+    def midPrice(self):
+        return (self.get_best_bid().price + self.get_best_ask().price) / 2
+
+    def _level_id(self, orderType: OrderType, tick: int) -> int:
+        key = (orderType, tick)
+        levelId = self._levelIds.get(key)
+        if levelId is None:
+            levelId = self._levelIds[key] = new_id()
+        return levelId
+
+    def _drop_level(self, orderType: OrderType, tick: int) -> int:
+        """forget the id of an emptied level, returns it (None if no view was
+        taken on the level)"""
+        levelId = self._levelIds.pop((orderType, tick), None)
+        if levelId is not None:
+            self._record(levelId, None)
+        return levelId
+
+    def _side(self, orderType: OrderType) -> np.ndarray:
+        return self.bids if orderType == OrderType.BUY else self.asks
+
+    def _grow(self, minIndex: int, maxIndex: int) -> int:
+        """reallocate so that [minIndex, maxIndex] fits with margin, returns
+        the shift of the indices. The arrays are only re-centered when the
+        span fits in half of them (prices drifting), doubled otherwise."""
+        used = np.flatnonzero((self.bids != 0) | (self.asks != 0))
+        low = min(minIndex, used[0]) if len(used) else minIndex
+        high = max(maxIndex, used[-1]) if len(used) else maxIndex
+        span = high - low + 1
+        if 2 * span <= len(self.bids):
+            capacity = len(self.bids)
+        else:
+            capacity = max(2 * len(self.bids), 2 * span)
+        shift = (capacity - span) // 2 - low
+
+        for name in ("bids", "asks"):
+            old = getattr(self, name)
+            new = np.zeros(capacity)
+            if len(used):
+                new[used[0] + shift : used[-1] + shift + 1] = old[
+                    used[0] : used[-1] + 1
+                ]
+            setattr(self, name, new)
+        self.baseTick -= shift
+        if self.bestBid >= 0:
+            self.bestBid += shift
+        if self.bestAsk >= 0:
+            self.bestAsk += shift
+        return shift
+
+    def _ticks(self, prices) -> np.ndarray:
+        """integer ticks of prices, ValueError if a price is off the grid
+        (snapping would silently move or merge levels)"""
+        prices = np.asarray(prices, dtype=float)
+        ticks = np.rint(prices / self.tickSize)
+        offGrid = np.abs(prices - ticks * self.tickSize) > 1e-7 * np.abs(prices)
+        if offGrid.any():
+            raise ValueError(
+                "Prices off the tickSize {} grid: {}".format(
+                    self.tickSize, prices[offGrid]
+                )
+            )
+        return ticks.astype(int)
+
+    def _indices(self, ticks: np.ndarray) -> np.ndarray:
+        if self.baseTick is None:
+            self.baseTick = int(ticks[0]) - len(self.bids) // 2
+        indices = ticks - self.baseTick
+        if indices.min() < 0 or indices.max() >= len(self.bids):
+            indices = indices + self._grow(indices.min(), indices.max())
+        return indices
+
+    # nearest levels are searched by windows growing from this size, the cost
+    # is proportional to the distance to the next level, not to the capacity
+    SCAN_WINDOW = 64
+
+    def _best_bid_below(self, index: int) -> int:
+        window, high = self.SCAN_WINDOW, index
+        while high > 0:
+            low = max(0, high - window)
+            levels = np.flatnonzero(self.bids[low:high])
+            if len(levels):
+                return low + int(levels[-1])
+            high, window = low, 2 * window
+        return -1
+
+    def _best_ask_above(self, index: int) -> int:
+        window, low = self.SCAN_WINDOW, index + 1
+        while low < len(self.asks):
+            high = low + window
+            levels = np.flatnonzero(self.asks[low:high])
+            if len(levels):
+                return low + int(levels[0])
+            low, window = high, 2 * window
+        return -1
+
+    def _depth(self, orderType: OrderType) -> DepthIndex:
+        side = self._side(orderType)
+        index = self._bidsDepth if orderType == OrderType.BUY else self._asksDepth
+        version = self.bidsVersion if orderType == OrderType.BUY else self.asksVersion
+        if index is None or index.version != version:
+            levels = np.flatnonzero(side)
+            if orderType == OrderType.BUY:
+                levels = levels[::-1]
+            prices = (self.baseTick + levels) * self.tickSize if len(levels) else []
+            index = DepthIndex(
+                prices,
+                side[levels],
+                -1 if orderType == OrderType.BUY else 1,
+                version,
+            )
+            if orderType == OrderType.BUY:
+                self._bidsDepth = index
+            else:
+                self._asksDepth = index
+        return index
+
+    def add_order(self, order: Order):
+        index = int(self._indices(self._ticks([order.price]))[0])
+        if self.changes is not None and not self._side(order.order_type)[index]:
+            level = TickLevel(self, order.order_type, self.baseTick + index)
+            self._record(level.id, level)
+        if order.order_type == OrderType.BUY:
+            self.bids[index] += order.quantity
+            self.bestBid = max(self.bestBid, index)
+        else:
+            self.asks[index] += order.quantity
+            if self.bestAsk < 0 or index < self.bestAsk:
+                self.bestAsk = index
+        self.touch(order.order_type)
+
+    def load_orders(self, bids: List[Order], asks: List[Order]):
+        """Replace both sides in one go (vectorized writes). The book is left
+        unchanged if a price is off the grid."""
+        sides = [
+            (orderType, self._ticks([o.price for o in orders]), orders)
+            for orderType, orders in ((OrderType.BUY, bids), (OrderType.SELL, asks))
+            if orders
+        ]
+        self.clear()
+        for orderType, ticks, orders in sides:
+            indices = self._indices(ticks)
+            np.add.at(self._side(orderType), indices, [o.quantity for o in orders])
+        self.bestBid = self._best_bid_below(len(self.bids))
+        self.bestAsk = self._best_ask_above(-1)
+        self.touch()
+        if self.changes is not None:
+            self.changes.extend((o.id, o) for o in self.ranked_bids)
+            self.changes.extend((o.id, o) for o in self.ranked_asks)
+
+    def remove_order(self, order: Order):
+        """Remove the level at the order price (ValueError if empty)"""
+        side = self._side(order.order_type)
+        index = int(round(order.price / self.tickSize)) - (self.baseTick or 0)
+        if self.baseTick is None or not 0 <= index < len(side) or not side[index]:
+            raise ValueError("{} not in book".format(order))
+        side[index] = 0.0
+        self._drop_level(order.order_type, self.baseTick + index)
+        if index == self.bestBid and order.order_type == OrderType.BUY:
+            self.bestBid = self._best_bid_below(index)
+        elif index == self.bestAsk and order.order_type == OrderType.SELL:
+            self.bestAsk = self._best_ask_above(index)
+        self.touch(order.order_type)
+
+    def set_quantity(self, order: Order, quantity: float):
+        """Change the quantity of a resting order in place"""
+        order.quantity = quantity
+        index = int(round(order.price / self.tickSize)) - self.baseTick
+        self._side(order.order_type)[index] = quantity
+        self.touch(order.order_type)
+
+    def copy(self, newIds: bool = False) -> "TickOffersLists":
+        """Copy of both sides: level ids are never copied (newIds always)"""
+        other = TickOffersLists(self.tickSize, len(self.bids))
+        other.baseTick = self.baseTick
+        other.bids = self.bids.copy()
+        other.asks = self.asks.copy()
+        other.bestBid = self.bestBid
+        other.bestAsk = self.bestAsk
+        return other
+
+    @property
+    def ranked_bids(self) -> List[TickLevel]:
+        indices = np.flatnonzero(self.bids)[::-1]
+        return [
+            TickLevel(self, OrderType.BUY, self.baseTick + i) for i in indices.tolist()
+        ]
+
+    @property
+    def ranked_asks(self) -> List[TickLevel]:
+        indices = np.flatnonzero(self.asks)
+        return [
+            TickLevel(self, OrderType.SELL, self.baseTick + i) for i in indices.tolist()
+        ]
+
+    def has_bid(self) -> bool:
+        return self.bestBid >= 0
+
+    def has_ask(self) -> bool:
+        return self.bestAsk >= 0
+
+    def get_best_bid(self) -> TickLevel:
+        if self.has_bid():
+            return TickLevel(self, OrderType.BUY, self.baseTick + self.bestBid)
+        return None
+
+    def get_best_ask(self) -> TickLevel:
+        if self.has_ask():
+            return TickLevel(self, OrderType.SELL, self.baseTick + self.bestAsk)
+        return None
+
+    def pop_best_bid(self) -> Order:
+        if not self.has_bid():
+            raise IndexError("pop from empty bids")
+        index = self.bestBid
+        price = (self.baseTick + index) * self.tickSize
+        order = Order(OrderType.BUY, price, float(self.bids[index]))
+        self.bids[index] = 0.0
+        levelId = self._drop_level(OrderType.BUY, self.baseTick + index)
+        if levelId is not None:
+            # the popped order is the level seen so far
+            order.id = levelId
+        self.bestBid = self._best_bid_below(index)
+        if self._bidsDepth is not None:
+            self._bidsDepth.skip_best(self.bidsVersion)
+        self.bidsVersion += 1
+        return order
+
+    def pop_best_ask(self) -> Order:
+        if not self.has_ask():
+            raise IndexError("pop from empty asks")
+        index = self.bestAsk
+        price = (self.baseTick + index) * self.tickSize
+        order = Order(OrderType.SELL, price, float(self.asks[index]))
+        self.asks[index] = 0.0
+        levelId = self._drop_level(OrderType.SELL, self.baseTick + index)
+        if levelId is not None:
+            # the popped order is the level seen so far
+            order.id = levelId
+        self.bestAsk = self._best_ask_above(index)
+        if self._asksDepth is not None:
+            self._asksDepth.skip_best(self.asksVersion)
+        self.asksVersion += 1
+        return order
+
+    def clear(self):
+        self.bids[:] = 0.0
+        self.asks[:] = 0.0
+        self.baseTick = None
+        self.bestBid = -1
+        self.bestAsk = -1
+        self._levelIds.clear()
+        self.touch()
+        if self.changes is not None:
+            self.changes = [(None, None)]
@@ -1,23 +1,35 @@
 from uuid import UUID, uuid4
 import logging
 
-from models.order import Order, OrderType
+from models.order import Order, OrderType, new_id
 
 
 # Transaction (seen from the taker perspective)
 class Transaction:
 
+    __slots__ = ("id", "order_id", "price", "quantity", "time", "_uuid")
+
     price: float
     time: float
 
     def __init__(
-        self, order_ref: UUID, price: float, quantity: float, time: float
+        self, order_ref: int, price: float, quantity: float, time: float
     ) -> None:
-        self.uuid = uuid4()
+        self.id = new_id()
+        self._uuid = None
+        # id of the maker order taken
+        self.order_id = order_ref
         self.price = price
         self.quantity = quantity
         self.time = time
 
+    @property
+    def uuid(self) -> UUID:
+        """Random UUID, only drawn when asked for"""
+        if self._uuid is None:
+            self._uuid = uuid4()
+        return self._uuid
+
     def __str__(self) -> str:
         return "[tx] t:{:.4f} {} {:.4f} @{:.4f}".format(
             self.time if self.time else -1,
@@ -40,4 +52,4 @@ def take_maker_order(order: Order, time: float = None) -> Transaction:
         logging.error("OrderType not recognized.")
         return None
 
-    return Transaction(order.uuid, order.price, signed_quantity, time)
+    return Transaction(order.id, order.price, signed_quantity, time)
@@ -0,0 +1,169 @@
+import glob
+import hashlib
+import json
+import logging
+import os
+import tempfile
+from typing import Callable
+import numpy as np
+from simul.path_generators import PathSource, geom_brownian_paths
+
+
+class PathBank:
+    """On disk cache of simulated path matrices, stored as .npy files named by
+    a hash of the simulation parameters. Hits are returned as read-only memmaps,
+    so several processes share the same pages instead of regenerating paths.
+    Files are written atomically (temp file + rename) and the bank is kept under
+    maxBytes by evicting the least recently used files (mtime is refreshed on
+    each hit, which works across processes)."""
+
+    cacheDir: str
+    maxBytes: int
+
+    def __init__(self, cacheDir: str, maxBytes: int = 2**30) -> None:
+        if maxBytes <= 0:
+            raise ValueError("maxBytes should be positive.")
+
+        self.cacheDir = cacheDir
+        self.maxBytes = maxBytes
+        os.makedirs(cacheDir, exist_ok=True)
+
+    @staticmethod
+    def key(params: dict) -> str:
+        text = json.dumps(params, sort_keys=True, default=str)
+        return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+    def file_of(self, params: dict) -> str:
+        return os.path.join(self.cacheDir, self.key(params) + ".npy")
+
+    def get(self, params: dict) -> np.ndarray:
+        """Memmap of the cached paths, None if missing."""
+        filename = self.file_of(params)
+        try:
+            paths = np.load(filename, mmap_mode="r")
+            os.utime(filename)
+        except FileNotFoundError:
+            return None
+        return paths
+
+    def _write(self, filename: str, mode: str, write: Callable):
+        """write(file) into a temp file renamed to filename, so that readers
+        never see a partial file"""
+        fd, tmpname = tempfile.mkstemp(dir=self.cacheDir, suffix=".tmp")
+        try:
+            with os.fdopen(fd, mode) as f:
+                write(f)
+            os.replace(tmpname, filename)
+        except BaseException:
+            os.remove(tmpname)
+            raise
+
+    def put(self, params: dict, paths: np.ndarray) -> np.ndarray:
+        """Store paths and return a memmap on the stored file."""
+        filename = self.file_of(params)
+
+        self._write(filename, "wb", lambda f: np.save(f, np.ascontiguousarray(paths)))
+        self._write(
+            filename[:-4] + ".json",
+            "w",
+            lambda f: json.dump(params, f, sort_keys=True, default=str),
+        )
+
+        self.evict(keep=filename)
+        return np.load(filename, mmap_mode="r")
+
+    def get_or_create(self, params: dict, generator: Callable[[], np.ndarray]):
+        paths = self.get(params)
+        if paths is None:
+            paths = self.put(params, generator())
+        return paths
+
+    def _entries(self):
+        entries = []
+        for name in os.listdir(self.cacheDir):
+            if not name.endswith(".npy"):
+                continue
+            filename = os.path.join(self.cacheDir, name)
+            try:
+                stat = os.stat(filename)
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, filename))
+        return entries
+
+    def size(self) -> int:
+        return sum(size for _, size, _ in self._entries())
+
+    def evict(self, keep: str = None):
+        """Remove least recently used files until the bank fits in maxBytes.
+        The keep file (just written) is never evicted, even if alone above cap."""
+        entries = sorted(self._entries())
+        total = sum(size for _, size, _ in entries)
+        for _, size, filename in entries:
+            if total <= self.maxBytes:
+                break
+            if filename == keep:
+                continue
+            logging.debug("PathBank evicting {}".format(filename))
+            for f in (filename, filename[:-4] + ".json"):
+                try:
+                    os.remove(f)
+                except FileNotFoundError:
+                    pass
+            total -= size
+
+    def clear(self):
+        """Remove the cached files, with the temp files left by interrupted
+        writes"""
+        for _, _, filename in self._entries():
+            os.remove(filename)
+            if os.path.exists(filename[:-4] + ".json"):
+                os.remove(filename[:-4] + ".json")
+        for filename in glob.glob(os.path.join(self.cacheDir, "*.tmp")):
+            try:
+                os.remove(filename)
+            except FileNotFoundError:
+                pass
+
+
+def cached_geom_brownian_paths(
+    bank: PathBank,
+    initPrice,
+    yearlyDrift,
+    yearlyVolat,
+    numDaysToSimul,
+    numPaths: int,
+    numStepPerDay: int = 1,
+    numDaysPerYearConvention: int = 252,
+    seed: int = None,
+    **kwargs,
+) -> np.ndarray:
+    """geom_brownian_paths served from the bank. Unseeded simulations are not
+    reproducible, so they bypass the cache."""
+    args = dict(
+        initPrice=initPrice,
+        yearlyDrift=yearlyDrift,
+        yearlyVolat=yearlyVolat,
+        numDaysToSimul=numDaysToSimul,
+        numPaths=numPaths,
+        numStepPerDay=numStepPerDay,
+        numDaysPerYearConvention=numDaysPerYearConvention,
+        seed=seed,
+        **kwargs,
+    )
+    if seed is None:
+        return geom_brownian_paths(**args)
+
+    params = dict(generator="geom_brownian_paths", **args)
+    return bank.get_or_create(params, lambda: geom_brownian_paths(**args))
+
+
+def cached_source_paths(
+    bank: PathBank, source: PathSource, numPaths: int, seed: int = None, **kwargs
+) -> np.ndarray:
+    """source.generate served from the bank (unseeded runs bypass the cache)"""
+    if seed is None:
+        return source.generate(numPaths, seed, **kwargs)
+
+    params = dict(numPaths=numPaths, seed=seed, **source.params())
+    return bank.get_or_create(params, lambda: source.generate(numPaths, seed, **kwargs))
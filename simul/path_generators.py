@@ -1,6 +1,12 @@
+from abc import ABC, abstractmethod
+import copy
+import hashlib
 from math import sqrt
 import numpy as np
-from numpy.random import default_rng
+from numpy.random import SeedSequence, default_rng
+from scipy.special import ndtri
+from scipy.stats import qmc
+import warnings
 
 
 def geom_brownian_path(
@@ -34,3 +40,813 @@ def geom_brownian_path(
     exponent[0] = 0
 
     return initPrice * np.exp(np.cumsum(exponent))
+
+
+def iter_geom_brownian_path(
+    initPrice,
+    yearlyDrift,
+    yearlyVolat,
+    numDaysToSimul,
+    chunkSize: int,
+    numStepPerDay: int = 1,
+    numDaysPerYearConvention: int = 252,
+    seed: int = None,
+):
+    """Streaming version of geom_brownian_path, yielding chunks of chunkSize
+    prices (the last one may be smaller). The last log-price is carried from one
+    chunk to the next, so memory stays constant whatever the horizon, and the
+    concatenated chunks are exactly geom_brownian_path with the same seed."""
+
+    if initPrice < 0:
+        raise ValueError("initPrice should be positive.")
+    if chunkSize <= 0:
+        raise ValueError("chunkSize should be positive.")
+
+    dt = 1 / float(numDaysPerYearConvention * numStepPerDay)
+    numSimul = int(numDaysToSimul * numStepPerDay)
+
+    drift = (yearlyDrift - 0.5 * yearlyVolat**2) * dt
+    volat = yearlyVolat * sqrt(dt)
+
+    rng = default_rng(seed=seed)
+
+    logPrice = 0.0
+    for start in range(0, numSimul, chunkSize):
+        e = rng.normal(0, 1, min(chunkSize, numSimul - start))
+
+        exponent = drift + volat * e
+        if start == 0:
+            exponent[0] = 0
+        # adding the carry first keeps the same summation order as np.cumsum
+        # on the whole path
+        exponent[0] += logPrice
+        np.cumsum(exponent, out=exponent)
+        logPrice = exponent[-1]
+
+        yield initPrice * np.exp(exponent)
+
+
+def bridge_cross_probability(
+    startPrice: float,
+    endPrice: float,
+    barrier: float,
+    yearlyVolat: float,
+    dt: float,
+) -> float:
+    """Probability that a GBM going from startPrice to endPrice over dt (in
+    years) touches barrier in between (closed form for the Brownian bridge
+    maximum/minimum of the log-price)."""
+    if barrier <= 0:
+        return 0.0
+    a, b, h = np.log(startPrice), np.log(endPrice), np.log(barrier)
+    if min(a, b) < h < max(a, b) or h == a or h == b:
+        return 1.0
+    variance = yearlyVolat**2 * dt
+    if variance <= 0:
+        return 0.0
+    return float(np.exp(-2 * (h - a) * (h - b) / variance))
+
+
+def brownian_bridge_fill(
+    startPrice: float,
+    endPrice: float,
+    numSubSteps: int,
+    yearlyVolat: float,
+    dt: float,
+    rng=None,
+) -> np.ndarray:
+    """numSubSteps - 1 intermediate prices of a GBM conditioned to go from
+    startPrice to endPrice over dt (in years), at regular sub-steps. The drift
+    does not matter once both ends are known."""
+    rng = rng if rng is not None else default_rng()
+    if numSubSteps < 2:
+        return np.empty(0)
+
+    a, b = np.log(startPrice), np.log(endPrice)
+    subDt = dt / numSubSteps
+    w = np.concatenate(([0.0], np.cumsum(rng.standard_normal(numSubSteps))))
+    # pin the free brownian motion on both ends
+    s = np.arange(numSubSteps + 1) / numSubSteps
+    bridge = w - s * w[-1]
+    logPrices = a + s * (b - a) + yearlyVolat * sqrt(subDt) * bridge
+    return np.exp(logPrices[1:-1])
+
+
+SAMPLINGS = ("normal", "antithetic", "sobol")
+
+
+def _brownian_bridge_plan(numSteps: int):
+    """Construction order of a Brownian bridge on times 1..numSteps: the
+    terminal point first, then recursive midpoints. Each row is
+    (point, left, right, weightLeft, weightRight, stdev), with W(0) = 0."""
+    plan = [(numSteps, 0, 0, 0.0, 0.0, sqrt(numSteps))]
+    intervals = [(0, numSteps)]
+    while intervals:
+        nextIntervals = []
+        for left, right in intervals:
+            if right - left < 2:
+                continue
+            mid = (left + right) // 2
+            span = float(right - left)
+            plan.append(
+                (
+                    mid,
+                    left,
+                    right,
+                    (right - mid) / span,
+                    (mid - left) / span,
+                    sqrt((mid - left) * (right - mid) / span),
+                )
+            )
+            nextIntervals.extend([(left, mid), (mid, right)])
+        intervals = nextIntervals
+    return plan
+
+
+def brownian_bridge_increments(z: np.ndarray) -> np.ndarray:
+    """Map (numPaths, numSteps) standard normals, sorted by importance, to unit
+    variance Brownian increments: column 0 drives the terminal value, the next
+    ones the successive midpoints. Useful with quasi-random numbers, whose first
+    dimensions are the best distributed."""
+    numPaths, numSteps = z.shape
+    w = np.zeros((numPaths, numSteps + 1), dtype=z.dtype)
+    for j, (k, left, right, wl, wr, stdev) in enumerate(
+        _brownian_bridge_plan(numSteps)
+    ):
+        w[:, k] = wl * w[:, left] + wr * w[:, right] + stdev * z[:, j]
+    return np.diff(w, axis=1)
+
+
+class _NormalDraws:
+    """Standard normal draws for the path generators, depending on sampling:
+    - normal     : pseudo random rng.standard_normal
+    - antithetic : rows (2k, 2k+1) are opposite draws
+    - sobol      : scrambled Sobol' sequence, one dimension per step
+    Draws are consumed sequentially, so filling row blocks one after the other
+    does not depend on the block size (even block sizes for antithetic).
+    Sobol' points are only balanced over power of 2 prefixes of the sequence:
+    other numbers of paths still work, with a weaker variance reduction."""
+
+    def __init__(
+        self,
+        numSteps: int,
+        sampling: str = "normal",
+        brownianBridge: bool = False,
+        seed: int = None,
+    ):
+        if sampling not in SAMPLINGS:
+            raise ValueError("sampling should be one of {}.".format(SAMPLINGS))
+
+        self.sampling = sampling
+        self.brownianBridge = brownianBridge
+        self.rng = default_rng(seed=seed)
+        self.sobol = None
+        if sampling == "sobol" and numSteps > 1:
+            # first step is not random (exponent[0] = 0)
+            self.sobol = qmc.Sobol(d=numSteps - 1, scramble=True, seed=seed)
+
+    def fill(self, out: np.ndarray):
+        numPaths, numSteps = out.shape
+
+        if self.sampling == "normal":
+            self.rng.standard_normal(out=out, dtype=out.dtype)
+        elif self.sampling == "antithetic":
+            if numPaths % 2:
+                raise ValueError("antithetic sampling needs an even number of paths.")
+            z = self.rng.standard_normal((numPaths // 2, numSteps), dtype=out.dtype)
+            out[0::2] = z
+            np.negative(z, out=out[1::2])
+        elif self.sobol is not None:
+            with warnings.catch_warnings():
+                # blocks are prefixes of one sequence, see the class docstring
+                warnings.filterwarnings("ignore", "The balance properties")
+                u = self.sobol.random(numPaths)
+            np.clip(u, 1e-12, 1 - 1e-12, out=u)
+            out[:, 1:] = ndtri(u)
+            out[:, 0] = 0
+
+        if self.brownianBridge and numSteps > 1:
+            out[:, 1:] = brownian_bridge_increments(out[:, 1:])
+
+        return out
+
+
+def _fill_geom_brownian(
+    out: np.ndarray,
+    draws: _NormalDraws,
+    initPrice: float,
+    yearlyDrift: float,
+    yearlyVolat: float,
+    dt: float,
+):
+    """Fill out (numPaths, numSteps) in place with GBM paths. Every operation
+    is done in place so that no temporary of the size of out is allocated."""
+    if out.size == 0:
+        return out
+    draws.fill(out)
+    out *= yearlyVolat * sqrt(dt)
+    out += (yearlyDrift - 0.5 * yearlyVolat**2) * dt
+    out[:, 0] = 0
+    np.cumsum(out, axis=1, out=out)
+    np.exp(out, out=out)
+    out *= initPrice
+    return out
+
+
+def path_pair_ids(numPaths: int, sampling: str = "normal") -> np.ndarray:
+    """Group id of each path: antithetic pairs share the same id, other
+    samplings give one group per path."""
+    if sampling == "antithetic":
+        return np.arange(numPaths) // 2
+    return np.arange(numPaths)
+
+
+def paired_mean_stderr(values, pairIds) -> tuple:
+    """Mean and standard error of a per-path estimator, averaging paired paths
+    first so that the error accounts for the antithetic correlation. With sobol
+    sampling the stderr is only indicative (use several seeds to estimate it)."""
+    values = np.asarray(values, dtype=float)
+    pairIds = np.asarray(pairIds)
+    _, inverse, counts = np.unique(pairIds, return_inverse=True, return_counts=True)
+    groupMeans = np.bincount(inverse, weights=values) / counts
+    numGroups = len(groupMeans)
+    if numGroups < 2:
+        return groupMeans.mean(), np.nan
+    return groupMeans.mean(), groupMeans.std(ddof=1) / sqrt(numGroups)
+
+
+def iter_geom_brownian_paths(
+    initPrice,
+    yearlyDrift,
+    yearlyVolat,
+    numDaysToSimul,
+    numPaths: int,
+    chunkSize: int,
+    numStepPerDay: int = 1,
+    numDaysPerYearConvention: int = 252,
+    seed: int = None,
+    dtype=np.float64,
+    sampling: str = "normal",
+    brownianBridge: bool = False,
+):
+    """Yield (chunkSize, numSteps) blocks of GBM paths (the last one may be
+    smaller). Only one block lives in memory at a time, and the random stream is
+    consumed sequentially: concatenating the blocks gives the same matrix as
+    geom_brownian_paths with the same seed, whatever the chunkSize.
+    See geom_brownian_paths for sampling and brownianBridge."""
+
+    if initPrice < 0:
+        raise ValueError("initPrice should be positive.")
+    if chunkSize <= 0:
+        raise ValueError("chunkSize should be positive.")
+
+    dt = 1 / float(numDaysPerYearConvention * numStepPerDay)
+    numSteps = int(numDaysToSimul * numStepPerDay)
+
+    draws = _NormalDraws(numSteps, sampling, brownianBridge, seed)
+
+    for start in range(0, numPaths, chunkSize):
+        out = np.empty((min(chunkSize, numPaths - start), numSteps), dtype=dtype)
+        yield _fill_geom_brownian(out, draws, initPrice, yearlyDrift, yearlyVolat, dt)
+
+
+def geom_brownian_paths(
+    initPrice,
+    yearlyDrift,
+    yearlyVolat,
+    numDaysToSimul,
+    numPaths: int,
+    numStepPerDay: int = 1,
+    numDaysPerYearConvention: int = 252,
+    seed: int = None,
+    dtype=np.float64,
+    chunkSize: int = None,
+    sampling: str = "normal",
+    brownianBridge: bool = False,
+) -> np.ndarray:
+    """Batched version of geom_brownian_path, returns a (numPaths, numSteps)
+    matrix. With float64, row 0 is exactly geom_brownian_path(seed=seed).
+
+    dtype          : np.float32 halves the memory footprint
+    chunkSize      : number of paths simulated per block (None for a single block)
+    sampling       : "normal", "antithetic" (paths 2k and 2k+1 are mirrored, see
+                     path_pair_ids) or "sobol" (scrambled quasi random)
+    brownianBridge : build each path terminal value first, then midpoints
+                     (mostly useful with sobol sampling)
+    """
+    if initPrice < 0:
+        raise ValueError("initPrice should be positive.")
+
+    dt = 1 / float(numDaysPerYearConvention * numStepPerDay)
+    numSteps = int(numDaysToSimul * numStepPerDay)
+    chunkSize = chunkSize or max(numPaths, 1)
+
+    draws = _NormalDraws(numSteps, sampling, brownianBridge, seed)
+
+    result = np.empty((numPaths, numSteps), dtype=dtype)
+    for start in range(0, numPaths, chunkSize):
+        _fill_geom_brownian(
+            result[start : start + chunkSize],
+            draws,
+            initPrice,
+            yearlyDrift,
+            yearlyVolat,
+            dt,
+        )
+
+    return result
+
+
+class PathSource(ABC):
+    """Common interface of the path generators. A source knows its model and
+    time grid, and produces (numPaths, numSteps) matrices of prices whose first
+    column is the initial price (same convention as geom_brownian_path), either
+    at once or by blocks of paths in bounded memory. Exchanges and Monte Carlo
+    loops can consume any source interchangeably."""
+
+    numSteps: int
+
+    def __len__(self) -> int:
+        return self.numSteps
+
+    @abstractmethod
+    def iter_generate(self, numPaths: int, chunkSize: int, seed: int = None):
+        """Yield blocks of at most chunkSize paths"""
+        ...
+
+    def generate(self, numPaths: int, seed: int = None, chunkSize: int = None):
+        """(numPaths, numSteps) matrix of paths"""
+        result = np.empty((numPaths, self.numSteps))
+        start = 0
+        for chunk in self.iter_generate(numPaths, chunkSize or max(numPaths, 1), seed):
+            result[start : start + len(chunk)] = chunk
+            start += len(chunk)
+        return result
+
+    def params(self) -> dict:
+        """Model parameters, e.g. to key a PathBank"""
+        values = {
+            k: v
+            for k, v in vars(self).items()
+            if isinstance(v, (int, float, str, bool, type(None)))
+        }
+        return dict(source=type(self).__name__, **values)
+
+
+class GeomBrownianSource(PathSource):
+    """PathSource of geom_brownian_paths"""
+
+    def __init__(
+        self,
+        initPrice,
+        yearlyDrift,
+        yearlyVolat,
+        numDaysToSimul,
+        numStepPerDay: int = 1,
+        numDaysPerYearConvention: int = 252,
+        sampling: str = "normal",
+        brownianBridge: bool = False,
+    ):
+        self.initPrice = initPrice
+        self.yearlyDrift = yearlyDrift
+        self.yearlyVolat = yearlyVolat
+        self.numDaysToSimul = numDaysToSimul
+        self.numStepPerDay = numStepPerDay
+        self.numDaysPerYearConvention = numDaysPerYearConvention
+        self.sampling = sampling
+        self.brownianBridge = brownianBridge
+        self.numSteps = int(numDaysToSimul * numStepPerDay)
+
+    def iter_generate(self, numPaths: int, chunkSize: int, seed: int = None):
+        return iter_geom_brownian_paths(
+            self.initPrice,
+            self.yearlyDrift,
+            self.yearlyVolat,
+            self.numDaysToSimul,
+            numPaths,
+            chunkSize,
+            self.numStepPerDay,
+            self.numDaysPerYearConvention,
+            seed,
+            sampling=self.sampling,
+            brownianBridge=self.brownianBridge,
+        )
+
+
+def iter_heston_paths(
+    initPrice,
+    yearlyDrift,
+    initVariance,
+    meanReversion,
+    longVariance,
+    volOfVol,
+    correlation,
+    numDaysToSimul,
+    numPaths: int,
+    chunkSize: int,
+    numStepPerDay: int = 1,
+    numDaysPerYearConvention: int = 252,
+    seed: int = None,
+):
+    """Heston paths by blocks of chunkSize, full truncation Euler scheme:
+        v' = v + k (theta - v+) dt + xi sqrt(v+ dt) Zv
+        log S' = log S + (mu - v+ / 2) dt + sqrt(v+ dt) Zs, corr(Zs, Zv) = rho
+    Each step is vectorized over the paths of the block. Price and variance
+    draws come from two independent streams consumed path after path, so the
+    result does not depend on chunkSize."""
+
+    if initPrice < 0:
+        raise ValueError("initPrice should be positive.")
+    if chunkSize <= 0:
+        raise ValueError("chunkSize should be positive.")
+    if not -1 <= correlation <= 1:
+        raise ValueError("correlation should be in [-1, 1].")
+
+    dt = 1 / float(numDaysPerYearConvention * numStepPerDay)
+    numSteps = int(numDaysToSimul * numStepPerDay)
+    rngVar, rngPrice = [default_rng(s) for s in SeedSequence(seed).spawn(2)]
+
+    for start in range(0, numPaths, chunkSize):
+        n = min(chunkSize, numPaths - start)
+        out = np.empty((n, numSteps))
+        if numSteps == 0:
+            yield out
+            continue
+
+        zv = rngVar.standard_normal((n, numSteps - 1))
+        zs = rngPrice.standard_normal((n, numSteps - 1))
+        zs *= sqrt(1 - correlation**2)
+        zs += correlation * zv
+
+        out[:, 0] = 0
+        v = np.full(n, float(initVariance))
+        for j in range(1, numSteps):
+            vPlus = np.maximum(v, 0)
+            volDt = np.sqrt(vPlus * dt)
+            out[:, j] = out[:, j - 1] + (yearlyDrift - 0.5 * vPlus) * dt
+            out[:, j] += volDt * zs[:, j - 1]
+            v += meanReversion * (longVariance - vPlus) * dt
+            v += volOfVol * volDt * zv[:, j - 1]
+
+        np.exp(out, out=out)
+        out *= initPrice
+        yield out
+
+
+class HestonSource(PathSource):
+    """PathSource of iter_heston_paths (stochastic volatility)"""
+
+    def __init__(
+        self,
+        initPrice,
+        yearlyDrift,
+        initVariance,
+        meanReversion,
+        longVariance,
+        volOfVol,
+        correlation,
+        numDaysToSimul,
+        numStepPerDay: int = 1,
+        numDaysPerYearConvention: int = 252,
+    ):
+        self.initPrice = initPrice
+        self.yearlyDrift = yearlyDrift
+        self.initVariance = initVariance
+        self.meanReversion = meanReversion
+        self.longVariance = longVariance
+        self.volOfVol = volOfVol
+        self.correlation = correlation
+        self.numDaysToSimul = numDaysToSimul
+        self.numStepPerDay = numStepPerDay
+        self.numDaysPerYearConvention = numDaysPerYearConvention
+        self.numSteps = int(numDaysToSimul * numStepPerDay)
+
+    def iter_generate(self, numPaths: int, chunkSize: int, seed: int = None):
+        return iter_heston_paths(
+            self.initPrice,
+            self.yearlyDrift,
+            self.initVariance,
+            self.meanReversion,
+            self.longVariance,
+            self.volOfVol,
+            self.correlation,
+            self.numDaysToSimul,
+            numPaths,
+            chunkSize,
+            self.numStepPerDay,
+            self.numDaysPerYearConvention,
+            seed,
+        )
+
+
+def iter_merton_jump_paths(
+    initPrice,
+    yearlyDrift,
+    yearlyVolat,
+    jumpIntensity,
+    jumpMean,
+    jumpVolat,
+    numDaysToSimul,
+    numPaths: int,
+    chunkSize: int,
+    numStepPerDay: int = 1,
+    numDaysPerYearConvention: int = 252,
+    seed: int = None,
+):
+    """Merton jump diffusion paths by blocks of chunkSize: GBM plus a compound
+    Poisson process of yearly intensity jumpIntensity, with log-jumps
+    N(jumpMean, jumpVolat^2). The drift is compensated so that yearlyDrift is
+    still the expected return. The n jumps of a step are drawn at once as
+    N(n jumpMean, n jumpVolat^2), so a block is fully vectorized."""
+
+    if initPrice < 0:
+        raise ValueError("initPrice should be positive.")
+    if chunkSize <= 0:
+        raise ValueError("chunkSize should be positive.")
+
+    dt = 1 / float(numDaysPerYearConvention * numStepPerDay)
+    numSteps = int(numDaysToSimul * numStepPerDay)
+    compensator = jumpIntensity * (np.exp(jumpMean + 0.5 * jumpVolat**2) - 1)
+    drift = (yearlyDrift - 0.5 * yearlyVolat**2 - compensator) * dt
+    rngDiff, rngCount, rngJump = [default_rng(s) for s in SeedSequence(seed).spawn(3)]
+
+    for start in range(0, numPaths, chunkSize):
+        n = min(chunkSize, numPaths - start)
+        out = rngDiff.standard_normal((n, numSteps))
+        out *= yearlyVolat * sqrt(dt)
+        out += drift
+
+        counts = rngCount.poisson(jumpIntensity * dt, (n, numSteps))
+        jumps = rngJump.standard_normal((n, numSteps))
+        jumps *= jumpVolat * np.sqrt(counts)
+        jumps += jumpMean * counts
+        out += jumps
+
+        if numSteps:
+            out[:, 0] = 0
+        np.cumsum(out, axis=1, out=out)
+        np.exp(out, out=out)
+        out *= initPrice
+        yield out
+
+
+class MertonJumpSource(PathSource):
+    """PathSource of iter_merton_jump_paths (jump diffusion)"""
+
+    def __init__(
+        self,
+        initPrice,
+        yearlyDrift,
+        yearlyVolat,
+        jumpIntensity,
+        jumpMean,
+        jumpVolat,
+        numDaysToSimul,
+        numStepPerDay: int = 1,
+        numDaysPerYearConvention: int = 252,
+    ):
+        self.initPrice = initPrice
+        self.yearlyDrift = yearlyDrift
+        self.yearlyVolat = yearlyVolat
+        self.jumpIntensity = jumpIntensity
+        self.jumpMean = jumpMean
+        self.jumpVolat = jumpVolat
+        self.numDaysToSimul = numDaysToSimul
+        self.numStepPerDay = numStepPerDay
+        self.numDaysPerYearConvention = numDaysPerYearConvention
+        self.numSteps = int(numDaysToSimul * numStepPerDay)
+
+    def iter_generate(self, numPaths: int, chunkSize: int, seed: int = None):
+        return iter_merton_jump_paths(
+            self.initPrice,
+            self.yearlyDrift,
+            self.yearlyVolat,
+            self.jumpIntensity,
+            self.jumpMean,
+            self.jumpVolat,
+            self.numDaysToSimul,
+            numPaths,
+            chunkSize,
+            self.numStepPerDay,
+            self.numDaysPerYearConvention,
+            seed,
+        )
+
+
+def iter_stationary_bootstrap_paths(
+    returns,
+    initPrice,
+    numSteps: int,
+    numPaths: int,
+    chunkSize: int,
+    meanBlockLength: float,
+    seed: int = None,
+):
+    """Paths resampled from historical log-returns with the stationary
+    bootstrap (Politis & Romano): blocks of consecutive returns (circular), of
+    geometric length with mean meanBlockLength, which preserves volatility
+    clustering. Block starts are drawn for a whole chunk at once, then a block
+    of paths is one gather plus one cumulative sum. returns can be a
+    memory-mapped array (np.load(..., mmap_mode="r"))."""
+
+    if initPrice < 0:
+        raise ValueError("initPrice should be positive.")
+    if chunkSize <= 0:
+        raise ValueError("chunkSize should be positive.")
+    if meanBlockLength < 1:
+        raise ValueError("meanBlockLength should be at least 1.")
+    if len(returns) == 0:
+        raise ValueError("returns should not be empty.")
+
+    numReturns = len(returns)
+    m = max(numSteps - 1, 0)
+    steps = np.arange(m)
+    rngBlocks, rngStarts = [default_rng(s) for s in SeedSequence(seed).spawn(2)]
+
+    for start in range(0, numPaths, chunkSize):
+        n = min(chunkSize, numPaths - start)
+        out = np.empty((n, numSteps))
+        if numSteps == 0:
+            yield out
+            continue
+
+        newBlock = rngBlocks.random((n, m)) < 1.0 / meanBlockLength
+        newBlock[:, 0] = True
+        starts = rngStarts.integers(0, numReturns, (n, m))
+
+        # position of the current block start, for every step
+        blockStep = np.where(newBlock, steps, 0)
+        np.maximum.accumulate(blockStep, axis=1, out=blockStep)
+        index = np.take_along_axis(starts, blockStep, axis=1)
+        index += steps - blockStep
+        index %= numReturns
+
+        out[:, 0] = 0
+        out[:, 1:] = np.asarray(returns)[index] if m else 0
+        np.cumsum(out, axis=1, out=out)
+        np.exp(out, out=out)
+        out *= initPrice
+        yield out
+
+
+class BootstrapSource(PathSource):
+    """PathSource of iter_stationary_bootstrap_paths. returns is an array of
+    historical log-returns, or the name of a .npy file that is memory-mapped."""
+
+    def __init__(
+        self,
+        returns,
+        initPrice,
+        numSteps: int,
+        meanBlockLength: float = 20,
+    ):
+        if isinstance(returns, str):
+            self.returnsFile = returns
+            returns = np.load(returns, mmap_mode="r")
+            # the content keys the paths: renamed or edited files are detected
+            self.returnsDigest = hashlib.sha1(
+                np.ascontiguousarray(returns).data
+            ).hexdigest()
+        else:
+            returns = np.asarray(returns, dtype=np.float64)
+            self.returnsFile = None
+            self.returnsDigest = hashlib.sha1(returns.tobytes()).hexdigest()
+        self.returns = returns
+        self.initPrice = initPrice
+        self.numSteps = int(numSteps)
+        self.meanBlockLength = meanBlockLength
+
+    def params(self) -> dict:
+        """Keyed on the returns content (returnsDigest), not the file name"""
+        params = super().params()
+        del params["returnsFile"]
+        return params
+
+    def iter_generate(self, numPaths: int, chunkSize: int, seed: int = None):
+        return iter_stationary_bootstrap_paths(
+            self.returns,
+            self.initPrice,
+            self.numSteps,
+            numPaths,
+            chunkSize,
+            self.meanBlockLength,
+            seed,
+        )
+
+
+class PhiloxPathSource(PathSource):
+    """GBM paths addressed by (baseSeed, pathIndex), backed by the counter based
+    Philox generator: path i (or a slice of its steps) is computed directly,
+    without generating paths 0..i-1 nor steps 0..start-1. Disjoint index ranges
+    computed by parallel workers reproduce a single process run bit for bit.
+
+    Brownian increments are drawn by blocks of blockSize steps: the block sums
+    come first in the counter stream, then each block is filled with normals
+    conditioned on its sum. Reaching a step only requires the block sums before
+    it and the normals of its own block."""
+
+    def __init__(
+        self,
+        initPrice,
+        yearlyDrift,
+        yearlyVolat,
+        numDaysToSimul,
+        numStepPerDay: int = 1,
+        numDaysPerYearConvention: int = 252,
+        baseSeed: int = 0,
+        blockSize: int = 256,
+    ):
+        if initPrice < 0:
+            raise ValueError("initPrice should be positive.")
+        if blockSize <= 0 or blockSize % 4:
+            raise ValueError("blockSize should be a positive multiple of 4.")
+
+        self.initPrice = initPrice
+        self.yearlyDrift = yearlyDrift
+        self.yearlyVolat = yearlyVolat
+        self.dt = 1 / float(numDaysPerYearConvention * numStepPerDay)
+        self.numSteps = int(numDaysToSimul * numStepPerDay)
+        self.baseSeed = baseSeed
+        self.blockSize = blockSize
+
+        # increments of steps 1..numSteps-1 (first step is initPrice)
+        self.numIncrements = max(self.numSteps - 1, 0)
+        self.numBlocks = -(-self.numIncrements // blockSize)
+        # Philox outputs 4 uint64 per counter value, keep regions aligned
+        self._sumsCounters = -(-self.numBlocks // 4)
+
+    def _uniforms(self, pathIndex: int, counter: int, size: int) -> np.ndarray:
+        bitGen = np.random.Philox(key=[self.baseSeed, pathIndex], counter=counter)
+        raw = bitGen.random_raw(size)
+        # 53 bits mantissa, shifted by half an ulp to exclude 0 and 1
+        return ((raw >> np.uint64(11)).astype(np.float64) + 0.5) * 2.0**-53
+
+    def _block_sums(self, pathIndex: int) -> np.ndarray:
+        sizes = np.minimum(
+            self.blockSize,
+            self.numIncrements - self.blockSize * np.arange(self.numBlocks),
+        )
+        z = ndtri(self._uniforms(pathIndex, 0, self.numBlocks))
+        return z * np.sqrt(sizes)
+
+    def _block_increments(self, pathIndex: int, block: int, blockSum: float):
+        size = min(self.blockSize, self.numIncrements - block * self.blockSize)
+        counter = self._sumsCounters + block * self.blockSize // 4
+        z = ndtri(self._uniforms(pathIndex, counter, size))
+        return z - z.mean() + blockSum / size
+
+    def brownian(self, pathIndex: int, start: int = 0, stop: int = None):
+        """Standard Brownian motion (unit variance per step) of path pathIndex,
+        on steps [start, stop). Step 0 is 0."""
+        stop = self.numSteps if stop is None else min(stop, self.numSteps)
+        start = max(start, 0)
+        result = np.zeros(max(stop - start, 0))
+        if stop <= max(start, 1):
+            return result
+
+        blockSums = self._block_sums(pathIndex)
+        blockStarts = np.concatenate(([0.0], np.cumsum(blockSums)))
+
+        # step j (j >= 1) is the sum of increments 0..j-1
+        first = max(start, 1)
+        for block in range(
+            (first - 1) // self.blockSize, (stop - 2) // self.blockSize + 1
+        ):
+            w = blockStarts[block] + np.cumsum(
+                self._block_increments(pathIndex, block, blockSums[block])
+            )
+            lo = 1 + block * self.blockSize
+            hi = lo + len(w)
+            sel = slice(max(lo, first), min(hi, stop))
+            result[sel.start - start : sel.stop - start] = w[
+                sel.start - lo : sel.stop - lo
+            ]
+
+        return result
+
+    def path(self, pathIndex: int, start: int = 0, stop: int = None) -> np.ndarray:
+        """Prices of path pathIndex on steps [start, stop), same convention as
+        geom_brownian_path (first price is initPrice)."""
+        stop = self.numSteps if stop is None else min(stop, self.numSteps)
+        steps = np.arange(max(start, 0), stop)
+        exponent = (self.yearlyDrift - 0.5 * self.yearlyVolat**2) * self.dt * steps
+        exponent += (
+            self.yearlyVolat * sqrt(self.dt) * self.brownian(pathIndex, start, stop)
+        )
+        return self.initPrice * np.exp(exponent)
+
+    def iter_generate(self, numPaths: int, chunkSize: int, seed: int = None):
+        """Paths 0..numPaths-1 by blocks, seed (if given) replaces baseSeed"""
+        source = self
+        if seed is not None and seed != self.baseSeed:
+            source = copy.copy(self)
+            source.baseSeed = seed
+        for start in range(0, numPaths, chunkSize):
+            yield source.paths(start, min(start + chunkSize, numPaths))
+
+    def paths(self, startIndex: int, stopIndex: int) -> np.ndarray:
+        """(stopIndex - startIndex, numSteps) matrix of paths startIndex..stopIndex-1"""
+        result = np.empty((max(stopIndex - startIndex, 0), self.numSteps))
+        for i, pathIndex in enumerate(range(startIndex, stopIndex)):
+            result[i] = self.path(pathIndex)
+        return result
@@ -0,0 +1,169 @@
+import os
+from typing import Iterator, Tuple
+import numpy as np
+import pandas as pd
+
+SECONDS_PER_YEAR = 365.25 * 24 * 3600
+
+
+def _as_seconds(values) -> np.ndarray:
+    """Numeric times are kept as is, dates are converted to epoch seconds."""
+    if pd.api.types.is_numeric_dtype(values.dtype):
+        return np.asarray(values, dtype=np.float64)
+    dates = pd.to_datetime(values)
+    return dates.to_numpy(dtype="datetime64[ns]").astype(np.int64) / 1e9
+
+
+class TickReplaySource:
+    """Streams a historical (time, price) series as vectorized blocks, without
+    loading the whole file: CSV and Parquet files are read by chunks of
+    chunkSize rows, .npy files (see convert_to_npy) are memory-mapped.
+    Times should be sorted. Dates are converted to epoch seconds.
+
+    resampleStep : if not None, keeps the last price of each resampleStep
+                   bucket (aligned on multiples of resampleStep), labelled with
+                   the bucket end time. Buckets spanning two chunks are merged.
+    inYears      : if True, times are returned in years elapsed since the first
+                   tick, the time unit of the makers (maturity, ttl)
+
+        exchange = ExchangeSingleMaker(maker)
+        source = TickReplaySource("ticks.csv", resampleStep=60, inYears=True)
+        for times, prices in source:
+            exchange.apply_arbitrage_path(prices, times)
+    """
+
+    filename: str
+    timeColumn: str
+    priceColumn: str
+    chunkSize: int
+    resampleStep: float
+    inYears: bool
+
+    def __init__(
+        self,
+        filename: str,
+        timeColumn: str = "time",
+        priceColumn: str = "price",
+        chunkSize: int = 1_000_000,
+        resampleStep: float = None,
+        inYears: bool = False,
+    ) -> None:
+        if chunkSize <= 0:
+            raise ValueError("chunkSize should be positive.")
+        if resampleStep is not None and resampleStep <= 0:
+            raise ValueError("resampleStep should be positive.")
+
+        self.filename = filename
+        self.timeColumn = timeColumn
+        self.priceColumn = priceColumn
+        self.chunkSize = chunkSize
+        self.resampleStep = resampleStep
+        self.inYears = inYears
+
+    def __iter__(self) -> Iterator[Tuple[np.ndarray, np.ndarray]]:
+        blocks = self.iter_raw()
+        if self.resampleStep is not None:
+            blocks = self._resample(blocks)
+        if self.inYears:
+            blocks = self._in_years(blocks)
+        return blocks
+
+    @staticmethod
+    def _in_years(blocks):
+        start = None
+        for times, prices in blocks:
+            if start is None:
+                if not len(times):
+                    continue
+                start = times[0]
+            yield (times - start) / SECONDS_PER_YEAR, prices
+
+    def iter_raw(self) -> Iterator[Tuple[np.ndarray, np.ndarray]]:
+        extension = os.path.splitext(self.filename)[1].lower()
+        if extension == ".npy":
+            return self._iter_npy()
+        if extension in (".parquet", ".pq"):
+            return self._iter_parquet()
+        return self._iter_csv()
+
+    def _iter_csv(self):
+        reader = pd.read_csv(
+            self.filename,
+            usecols=[self.timeColumn, self.priceColumn],
+            chunksize=self.chunkSize,
+        )
+        for df in reader:
+            yield (
+                _as_seconds(df[self.timeColumn]),
+                df[self.priceColumn].to_numpy(dtype=np.float64),
+            )
+
+    def _iter_parquet(self):
+        try:
+            import pyarrow.parquet as pq
+        except ImportError as e:
+            raise ImportError("Parquet replay requires pyarrow.") from e
+
+        parquet = pq.ParquetFile(self.filename)
+        for batch in parquet.iter_batches(
+            batch_size=self.chunkSize, columns=[self.timeColumn, self.priceColumn]
+        ):
+            df = batch.to_pandas()
+            yield (
+                _as_seconds(df[self.timeColumn]),
+                df[self.priceColumn].to_numpy(dtype=np.float64),
+            )
+
+    def _iter_npy(self):
+        data = np.load(self.filename, mmap_mode="r")
+        if data.ndim != 2 or data.shape[1] != 2:
+            raise ValueError("npy replay expects a (n, 2) array of time, price.")
+        for start in range(0, len(data), self.chunkSize):
+            block = np.array(data[start : start + self.chunkSize], dtype=np.float64)
+            yield block[:, 0], block[:, 1]
+
+    def _resample(self, blocks):
+        step = self.resampleStep
+        pendingBucket = None
+        pendingPrice = None
+
+        for times, prices in blocks:
+            if len(times) == 0:
+                continue
+            buckets = np.floor(times / step).astype(np.int64)
+            # last tick of each bucket
+            ends = np.append(np.flatnonzero(np.diff(buckets)), len(buckets) - 1)
+            outBuckets = buckets[ends]
+            outPrices = prices[ends]
+
+            if pendingBucket is not None and pendingBucket != outBuckets[0]:
+                outBuckets = np.insert(outBuckets, 0, pendingBucket)
+                outPrices = np.insert(outPrices, 0, pendingPrice)
+
+            # the last bucket may continue in the next block
+            pendingBucket, pendingPrice = outBuckets[-1], outPrices[-1]
+            if len(outBuckets) > 1:
+                yield (outBuckets[:-1] + 1) * step, outPrices[:-1]
+
+        if pendingBucket is not None:
+            yield np.array([(pendingBucket + 1) * step]), np.array([pendingPrice])
+
+
+def convert_to_npy(source: TickReplaySource, filename: str) -> str:
+    """Preconvert a replay source to a (n, 2) float64 .npy file of time, price
+    (resampled if the source is), that later replays memory-map. The source is
+    streamed twice: once to count rows, once to fill the file."""
+    numRows = sum(len(times) for times, _ in source)
+
+    out = np.lib.format.open_memmap(
+        filename, mode="w+", dtype=np.float64, shape=(numRows, 2)
+    )
+    start = 0
+    for times, prices in source:
+        out[start : start + len(times), 0] = times
+        out[start : start + len(times), 1] = prices
+        start += len(times)
+    out.flush()
+    del out
+
+    return filename
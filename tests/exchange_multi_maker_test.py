@@ -0,0 +1,153 @@
+import copy
+import pytest
+from exchange_multi_maker import ExchangeMultiMaker
+from exchange_single_maker import ExchangeSingleMaker
+from makers.maker_delta import MakerDelta
+from makers.maker_zero_knowledge import MakerZeroKnowledge
+from models.order import Order, OrderType
+from models.tick_book import TickOffersLists
+from simul.path_generators import geom_brownian_path
+
+
+def test_single_maker_matches_single_exchange():
+    path = geom_brownian_path(100, 0.0, 0.5, 60, 4, seed=3)
+
+    single = ExchangeSingleMaker(MakerZeroKnowledge(100, 0.5, 50, 0.1, 50, 0.1))
+    multi = ExchangeMultiMaker([MakerZeroKnowledge(100, 0.5, 50, 0.1, 50, 0.1)], 0.5)
+    for i, price in enumerate(path):
+        single.apply_arbitrage(price, i)
+        multi.apply_arbitrage(price, i)
+
+    assert len(single.transactions) > 20
+    assert [(t.price, t.quantity) for t in multi.transactions] == pytest.approx(
+        [(t.price, t.quantity) for t in single.transactions]
+    )
+    assert multi.makers[0].cash == pytest.approx(single.maker.cash)
+
+
+def test_price_time_priority():
+    first = MakerZeroKnowledge(100, 0.5, 10, 1, 10, 1)
+    second = MakerZeroKnowledge(100, 0.5, 10, 2, 10, 2)
+    exchange = ExchangeMultiMaker([first, second], 0.5)
+    assert exchange.midPrice == 100
+
+    exchange.apply_arbitrage(101, 1)
+    # 100.5 of first, then second, then 101 of first (at price)
+    assert [(t.price, t.quantity) for t in exchange.transactions] == [
+        (100.5, 1),
+        (100.5, 2),
+        (101, 1),
+    ]
+    assert len(exchange.makerTransactions[0]) == 2
+    assert first.asset == -2
+    assert second.asset == -2
+
+    # redeployed bids are merged back in the book, second keeps its ask at 101
+    exchange.sync()
+    assert exchange.offers.get_best_ask().price == 101
+    assert (
+        exchange.makers[exchange._owners[exchange.offers.get_best_ask().id]] is second
+    )
+    assert exchange.offers.get_best_bid().price == 100.5
+
+
+def test_mixed_makers():
+    path = geom_brownian_path(100, 0.0, 0.5, 60, 4, seed=5)
+    curve = lambda x: 100 * 100 / x
+    makers = [
+        MakerZeroKnowledge(100, 0.5, 20, 0.1, 20, 0.1),
+        # re-quotes on the grid of its first mid price
+        MakerDelta(100, curve, 20, 0.5, incrementalRequote=True),
+        MakerDelta(
+            100,
+            curve,
+            20,
+            1,
+            incrementalRequote=True,
+            offersLists=TickOffersLists(0.5),
+        ),
+    ]
+    exchange = ExchangeMultiMaker(makers, 0.5)
+    exchange.apply_arbitrage_chunks([path], 1)
+
+    assert all(exchange.makerTransactions)
+    assert sum(map(len, exchange.makerTransactions)) == len(exchange.transactions)
+    # the book mirrors the offers of every maker
+    numOffers = sum(
+        len(m.offers.ranked_bids) + len(m.offers.ranked_asks) for m in makers
+    )
+    exchange.sync()
+    assert len(exchange.offers.ranked_bids) + len(exchange.offers.ranked_asks) == (
+        numOffers
+    )
+
+
+def test_off_grid_maker_rejected():
+    with pytest.raises(ValueError):
+        ExchangeMultiMaker([MakerZeroKnowledge(100, 0.25, 10, 1, 10, 1)], 0.5)
+
+
+def test_take_only_the_synced_order():
+    maker = MakerZeroKnowledge(100, 1, 10, 1, 10, 1)
+    exchange = ExchangeMultiMaker([maker], 0.5)
+    # a better ask the exchange has not seen yet
+    maker.offers.add_order(Order(OrderType.SELL, 100.5, 2))
+    assert exchange._take(OrderType.SELL) is None
+    assert exchange.offers.get_best_ask().price == 101
+    assert not exchange.transactions
+
+    exchange.apply_arbitrage(100.5, 1)
+    assert [(t.price, t.quantity) for t in exchange.transactions] == [(100.5, 2)]
+
+
+def test_crossed_book():
+    # orders of different makers are not matched against each other
+    low = MakerZeroKnowledge(100, 0.5, 10, 1, 10, 1)
+    high = MakerZeroKnowledge(105, 0.5, 10, 1, 10, 1)
+    exchange = ExchangeMultiMaker([low, high], 0.5)
+    assert exchange.crossed
+
+    # only the asks are taken, up to the price
+    exchange.apply_arbitrage(102, 1)
+    assert [(t.price, t.quantity) for t in exchange.transactions] == [
+        (100.5, 1),
+        (101, 1),
+        (101.5, 1),
+        (102, 1),
+    ]
+    assert exchange.makerTransactions[1] == []
+    assert exchange.crossed
+
+
+def test_cloned_makers():
+    template = MakerZeroKnowledge(100, 1, 10, 1, 10, 1)
+    first, second = template.clone(), template.clone()
+    assert first.offers.get_best_ask().id != second.offers.get_best_ask().id
+    exchange = ExchangeMultiMaker([first, second], 1)
+    exchange.apply_arbitrage(102.5, 0.1)
+    assert [(t.price, t.quantity) for t in exchange.transactions] == [
+        (101, 1),
+        (101, 1),
+        (102, 1),
+        (102, 1),
+    ]
+
+    # copied orders keep their ids: such makers are refused
+    copied = copy.copy(template)
+    copied.offersLists = template.offersLists.copy()
+    with pytest.raises(ValueError):
+        ExchangeMultiMaker([template, copied], 1)
+
+
+def test_maker_orders_not_modified():
+    maker = MakerDelta(
+        100, lambda x: 100 * 100 / x, 10, 0.3, offersLists=TickOffersLists(0.3)
+    )
+    plain = MakerZeroKnowledge(100, 0.1, 10, 1, 10, 1)
+    exchange = ExchangeMultiMaker([maker, plain], 0.1)
+    prices = [o.price for o in plain.offers.ranked_asks]
+    exchange.apply_arbitrage(100.65, 1)
+    assert exchange.transactions
+    assert [o.price for o in plain.offers.ranked_asks] == prices[
+        len(exchange.makerTransactions[1]) :
+    ]
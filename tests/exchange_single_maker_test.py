@@ -0,0 +1,68 @@
+import pytest
+from exchange_single_maker import ExchangeSingleMaker
+from makers.maker_delta import MakerDelta
+from makers.maker_zero_knowledge import MakerZeroKnowledge
+from simul.path_generators import geom_brownian_path, iter_geom_brownian_path
+
+
+def get_exchange():
+    return ExchangeSingleMaker(MakerDelta(100, lambda x: 100 * 100 / x, 5, 0.5))
+
+
+def test_apply_arbitrage_chunks():
+    path = geom_brownian_path(100, 0.0, 0.4, 50, 4, seed=2)
+
+    exchange1 = get_exchange()
+    time = 0
+    for price in path:
+        time += 0.001
+        exchange1.apply_arbitrage(price, time)
+
+    exchange2 = get_exchange()
+    chunks = iter_geom_brownian_path(100, 0.0, 0.4, 50, 16, 4, seed=2)
+    last_time = exchange2.apply_arbitrage_chunks(chunks, 0.001)
+
+    assert last_time == time
+    assert len(exchange1.transactions) > 0
+    assert len(exchange1.transactions) == len(exchange2.transactions)
+    assert exchange1.maker.cash == exchange2.maker.cash
+    assert exchange1.maker.asset == exchange2.maker.asset
+
+
+def test_apply_arbitrage_refined():
+    dt = 1 / 252.0
+
+    # a coarse step that comes back to the same price crosses the ladder
+    # intraday with a high volatility
+    exchange = ExchangeSingleMaker(MakerDelta(100, lambda x: 100 * 100 / x, 5, 0.5), 1)
+    exchange.apply_arbitrage(100, 0)
+    exchange.apply_arbitrage_refined(100, dt, 0.8, 10)
+    assert len(exchange.transactions) > 0
+
+    # far from the ladder nothing is refined
+    exchange = ExchangeSingleMaker(MakerDelta(100, lambda x: 100 * 100 / x, 5, 5), 1)
+    exchange.apply_arbitrage(100, 0)
+    exchange.apply_arbitrage_refined(100, dt, 0.01, 10)
+    assert len(exchange.transactions) == 0
+
+
+def test_depth_queries():
+    exchange = get_exchange()
+    quantity, notional = exchange.depth_to_price(102)
+    bid, average = exchange.price_for_depth(-1)
+
+    exchange.apply_arbitrage(102, 0.001)
+    assert quantity == pytest.approx(-exchange.maker.asset + 100)
+    assert notional == pytest.approx(exchange.maker.cash + 100 * 100)
+    assert exchange.depth_to_price(exchange.midPrice) == (0, 0)
+    assert bid < average < 100
+
+
+def test_take_to_price_deep_jump():
+    # step-by-step sweep over more levels than the recursion limit
+    maker = MakerZeroKnowledge(100, 0.01, 5000, 1, 5000, 1)
+    exchange = ExchangeSingleMaker(maker, fastForward=False)
+    exchange.apply_arbitrage(130, 1)
+
+    assert len(exchange.transactions) == 3000
+    assert exchange.offers.get_best_ask().price == pytest.approx(130.01)
@@ -0,0 +1,77 @@
+import math
+import numpy as np
+from makers.delta_cache import DeltaCache
+from makers.maker_delta import MakerDelta
+
+
+def test_cache_hits_zero_values():
+    calls = []
+
+    def fun(x):
+        calls.append(x)
+        return 0.0
+
+    cache = DeltaCache(fun)
+    assert cache(1.0) == 0.0
+    assert cache(1.0) == 0.0
+    assert len(calls) == 1
+    assert cache.hits == 1
+    assert cache.misses == 1
+
+
+def test_quantized_keys():
+    cache = DeltaCache(lambda x: x, priceStep=0.5)
+    assert cache(100.1) == 100.0
+    assert cache(99.9) == 100.0
+    assert cache(100.3) == 100.5
+    assert cache.stats()["hits"] == 1
+    assert len(cache) == 2
+
+
+def test_lru_eviction():
+    cache = DeltaCache(lambda x: x, maxSize=2)
+    cache(1.0)
+    cache(2.0)
+    cache(1.0)
+    cache(3.0)
+    assert cache.evictions == 1
+    assert len(cache) == 2
+    cache(1.0)
+    assert cache.hits == 2
+    cache(2.0)
+    assert cache.misses == 4
+
+
+def test_evaluate():
+    calls = []
+
+    def fun(x):
+        calls.append(len(x))
+        return x
+
+    cache = DeltaCache(fun, priceStep=0.5)
+    assert list(cache.evaluate(np.array([100.1, 99.9, 100.3]))) == [100, 100, 100.5]
+    assert list(cache.evaluate(np.array([100.3, 101.0]))) == [100.5, 101]
+    # one call per batch, on the missing keys only
+    assert calls == [2, 1]
+    assert cache.stats()["hits"] == 2
+    assert cache.misses == 3
+
+
+def test_maker_delta_cache_stats():
+    # vectorized and scalar-only deltaFun: ladders go through the cache
+    maker = MakerDelta(100, lambda x: 1e4 / x, 5, 0.5, cacheSize=8)
+    for price in [100, 101, 99.5, 100.5, 100]:
+        maker._init_orderbook(price)
+    stats = maker.cacheStats
+    assert stats["size"] <= 8
+    assert stats["evictions"] > 0
+    assert stats["hits"] > 0
+
+    maker = MakerDelta(100, lambda x: math.pow(x, -1) * 1e4, 5, 0.5, cacheSize=8)
+    for price in [100, 101, 99.5, 100.5, 100]:
+        maker._init_orderbook(price)
+    stats = maker.cacheStats
+    assert stats["size"] <= 8
+    assert stats["evictions"] > 0
+    assert stats["hits"] > 0
@@ -0,0 +1,68 @@
+import math
+import numpy as np
+from makers.delta_functions import (
+    CallDelta,
+    ConstantNotional,
+    ConstantProduct,
+    FixedTtl,
+    ScalarDelta,
+    as_vectorized,
+)
+from makers.maker_delta import MakerDelta
+from makers.maker_replication import MakerReplication
+import utils_black_scholes as bs
+
+
+def test_scalar_adapter():
+    calls = []
+
+    def scalar(x, t):
+        calls.append(x)
+        return math.exp(-x * t)
+
+    fun = as_vectorized(scalar)
+    assert isinstance(fun, ScalarDelta)
+    assert fun(1.0, 2.0) == math.exp(-2.0)
+
+    x = np.array([1.0, 2.0, 3.0])
+    assert np.allclose(fun(x, 0.5), np.exp(-0.5 * x))
+    assert fun.acceptsArrays is False
+
+    numpy_fun = as_vectorized(lambda x, t: np.exp(-x * t))
+    assert np.allclose(numpy_fun(x, 0.5), np.exp(-0.5 * x))
+    assert numpy_fun.acceptsArrays
+
+
+def test_vectorized_functions_pass_through():
+    delta = CallDelta(100, 0.2)
+    assert as_vectorized(delta) is delta
+
+
+def test_builtin_curves():
+    x = np.array([80.0, 100.0, 125.0])
+    assert np.allclose(CallDelta(100, 0.2)(x, 0.5), -bs.call_delta(x, 100, 0.5, 0, 0.2))
+    assert np.allclose(
+        FixedTtl(CallDelta(100, 0.2), 0.5)(x), CallDelta(100, 0.2)(x, 0.5)
+    )
+    assert np.allclose(ConstantNotional(1e4)(x), 1e4 / x)
+    assert np.allclose(ConstantProduct(10)(x) ** 2 * x, 100)
+    # decreasing curves
+    for fun in (
+        FixedTtl(CallDelta(100, 0.2), 0.5),
+        ConstantNotional(1),
+        ConstantProduct(1),
+    ):
+        assert (np.diff(fun(x)) < 0).all()
+
+
+def test_makers_with_builtin_curves():
+    lambdaMaker = MakerDelta(100, lambda x: 100 * 100 / x, 20, 0.5)
+    curveMaker = MakerDelta(100, ConstantNotional(100 * 100), 20, 0.5)
+    for o1, o2 in zip(
+        lambdaMaker.offersLists.ranked_asks, curveMaker.offersLists.ranked_asks
+    ):
+        assert math.isclose(o1.quantity, o2.quantity, rel_tol=1e-12)
+
+    maker = MakerReplication(100, CallDelta(100, 0.2), 1.0, 20, 0.5)
+    assert math.isclose(maker.asset, -bs.call_delta(100, 100, 1.0, 0, 0.2))
+    assert len(maker.offersLists.ranked_bids) == 20
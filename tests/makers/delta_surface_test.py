@@ -0,0 +1,45 @@
+from makers.delta_surface import DeltaSurface
+from makers.maker_replication import MakerReplication
+import numpy as np
+import utils_black_scholes as bs
+
+
+def delta_fun(x, t):
+    return -bs.call_delta(x, 100, t, 0, 0.2)
+
+
+def test_build_with_tolerance():
+    surface = DeltaSurface.build(
+        delta_fun, 50, 200, 1.0, 41, 11, tolerance=1e-3, minTtl=5 / 252
+    )
+    assert surface.maxError <= 1e-3
+    x = np.linspace(60, 190, 50)
+    assert np.allclose(surface(x, 0.37), delta_fun(x, 0.37), atol=1e-3)
+    # monotone in price
+    assert (np.diff(surface(x, 0.37)) <= 0).all()
+    # exact outside the grid
+    assert surface(250.0, 0.5) == delta_fun(250.0, 0.5)
+    assert surface(100.0, 0.0) == delta_fun(100.0, 0.0)
+
+
+def test_save_and_load(tmp_path):
+    surface = DeltaSurface.build(delta_fun, 50, 200, 1.0, 21, 11)
+    filename = str(tmp_path / "surface.npz")
+    surface.save(filename)
+
+    loaded = DeltaSurface.load(filename)
+    x = np.linspace(50, 200, 30)
+    assert np.array_equal(loaded(x, 0.5), surface(x, 0.5))
+    # no exact function: clamped to the border
+    assert loaded(300.0, 0.5) == loaded(200.0, 0.5)
+
+
+def test_surface_as_maker_delta_function():
+    surface = DeltaSurface.build(delta_fun, 50, 200, 1.0, tolerance=1e-4, minTtl=0.01)
+    exact = MakerReplication(100, delta_fun, 1.0, 5, 0.5)
+    approx = MakerReplication(100, surface, 1.0, 5, 0.5)
+    assert abs(exact.asset - approx.asset) < 1e-4
+    bids = zip(exact.offers.ranked_bids, approx.offers.ranked_bids)
+    for b1, b2 in bids:
+        assert b1.price == b2.price
+        assert abs(b1.quantity - b2.quantity) < 2e-4
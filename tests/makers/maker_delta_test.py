@@ -84,3 +84,89 @@ def test_ccash_and_asset_position():
 
 
 # # print(maker.offersLists)
+
+
+def ladder(maker):
+    return [(o.price, o.quantity) for o in maker.offersLists.ranked_bids], [
+        (o.price, o.quantity) for o in maker.offersLists.ranked_asks
+    ]
+
+
+def test_incremental_requote_same_ladder():
+    full = get_maker_100_1_x_5_05()
+    incr = MakerDelta(100, lambda x: 100 * 100 / x, 5, 0.5, incrementalRequote=True)
+    assert ladder(full) == ladder(incr)
+
+    for _ in range(3):
+        full.sell_at_first_rank()
+        full.post_hook(full.currentMissingOffer, 0)
+        incr.sell_at_first_rank()
+        incr.post_hook(incr.currentMissingOffer, 0)
+    full.buy_at_first_rank()
+    full.post_hook(full.currentMissingOffer, 0)
+    incr.buy_at_first_rank()
+    incr.post_hook(incr.currentMissingOffer, 0)
+
+    assert isclose_loc(full.cash, incr.cash)
+    assert isclose_loc(full.asset, incr.asset)
+    for side_full, side_incr in zip(ladder(full), ladder(incr)):
+        assert len(side_full) == len(side_incr) == 5
+        for (p1, q1), (p2, q2) in zip(side_full, side_incr):
+            assert isclose_loc(p1, p2)
+            assert isclose_loc(q1, q2)
+
+
+def test_incremental_requote_keeps_orders():
+    maker = MakerDelta(100, lambda x: 100 * 100 / x, 5, 0.5, incrementalRequote=True)
+    bids = list(maker.offersLists.ranked_bids)
+
+    maker.sell_at_first_rank()
+    maker.post_hook(maker.currentMissingOffer, 0)
+
+    # the 4 remaining bids are the same objects, a single level entered
+    remaining = list(maker.offersLists.ranked_bids)
+    assert remaining[:4] == bids[1:]
+    assert all(o is b for o, b in zip(remaining[:4], bids[1:]))
+    assert sorted(maker.levelBids) == [-6, -5, -4, -3, -2]
+    assert sorted(maker.levelAsks) == [0, 1, 2, 3, 4]
+
+
+def test_incremental_requote_requires_tick_interval():
+    with pytest.raises(ValueError):
+        MakerDelta(
+            100, lambda x: 100 * 100 / x, 5, tickQuantity=1, incrementalRequote=True
+        )
+
+
+def test_vectorized_ladder_matches_scalar_delta():
+    maker = MakerDelta(100, lambda x: 100 * 100 / x, 1000, 0.5)
+    scalar = MakerDelta(100, lambda x: 100 * 100 / float(x), 1000, 0.5)
+    assert maker.vectorizedDelta
+    assert not scalar.vectorizedDelta
+    # bids stop before non positive prices
+    assert len(maker.offersLists.ranked_bids) == 199
+    assert len(maker.offersLists.ranked_asks) == 1000
+    assert ladder(maker) == ladder(scalar)
+
+
+def test_tick_quantity_ladder():
+    maker = MakerDelta(100, lambda x: 100 * 100 / x, 5, tickQuantity=0.5)
+    bids, asks = ladder(maker)
+    for k, (price, quantity) in enumerate(bids, 1):
+        assert isclose(price, 1e4 / (100 + 0.5 * k), rel_tol=1e-10)
+        assert quantity == 0.5
+    for k, (price, quantity) in enumerate(asks, 1):
+        assert isclose(price, 1e4 / (100 - 0.5 * k), rel_tol=1e-10)
+        assert quantity == 0.5
+
+    maker.sell_at_first_rank()
+    maker.post_hook(maker.currentMissingOffer, 0)
+    assert maker.asset == 100.5
+    bids, asks = ladder(maker)
+    assert isclose(bids[0][0], 1e4 / 101, rel_tol=1e-10)
+    assert isclose(asks[0][0], 100, rel_tol=1e-10)
+
+
+def test_tick_interval_or_quantity_required():
+    with pytest.raises(ValueError):
+        MakerDelta(100, lambda x: 100 * 100 / x, 5)
@@ -0,0 +1,119 @@
+from math import isclose
+from makers.maker_replication import MakerReplication
+from utils_black_scholes import call_delta
+
+TEST_ABS_TOL = 1e-9
+
+
+def delta_fun(x, t):
+    return 1 - call_delta(x, 100, t, 0, 0.5)
+
+
+def get_maker(incrementalRequote=False):
+    return MakerReplication(
+        100, delta_fun, 1.0, 20, 0.5, incrementalRequote=incrementalRequote
+    )
+
+
+def ladder(maker):
+    return [(o.price, o.quantity) for o in maker.offersLists.ranked_bids], [
+        (o.price, o.quantity) for o in maker.offersLists.ranked_asks
+    ]
+
+
+def test_incremental_requote_follows_time():
+    full, incr = get_maker(), get_maker(True)
+
+    for time, take in [(0.1, "buy"), (0.2, "sell"), (0.3, "sell"), (0.5, "buy")]:
+        for maker in (full, incr):
+            if take == "buy":
+                maker.buy_at_first_rank()
+            else:
+                maker.sell_at_first_rank()
+            maker.post_hook(maker.currentMissingOffer, time)
+
+    assert isclose(full.ttl, incr.ttl)
+    assert isclose(full.asset, incr.asset, abs_tol=TEST_ABS_TOL)
+    for side_full, side_incr in zip(ladder(full), ladder(incr)):
+        assert len(side_full) == len(side_incr)
+        for (p1, q1), (p2, q2) in zip(side_full, side_incr):
+            assert isclose(p1, p2, abs_tol=TEST_ABS_TOL)
+            assert isclose(q1, q2, abs_tol=TEST_ABS_TOL)
+
+
+def test_tick_quantity_ladder():
+    maker = MakerReplication(100, delta_fun, 1.0, 50, tickQuantity=0.05)
+    bids, asks = ladder(maker)
+    # the delta is bounded in [0, 1]: levels out of reach are not deployed
+    assert len(bids) + len(asks) == 19
+    for k, (price, quantity) in enumerate(bids, 1):
+        assert isclose(delta_fun(price, 1.0), maker.asset + 0.05 * k, abs_tol=1e-9)
+        assert quantity == 0.05
+    for k, (price, quantity) in enumerate(asks, 1):
+        assert isclose(delta_fun(price, 1.0), maker.asset - 0.05 * k, abs_tol=1e-9)
+
+
+def test_throttled_requote_reposts_fills():
+    full = get_maker()
+    throttled = MakerReplication(100, delta_fun, 1.0, 20, 0.5, requoteTtlThreshold=0.1)
+    for maker in (full, throttled):
+        maker.sell_at_first_rank()
+        maker.sell_at_first_rank()
+        maker.post_hook(maker.currentMissingOffer, 0)
+    assert throttled.skippedRequotes == 1
+    assert throttled.lastOffer is not None
+    # no fill, nothing skipped
+    throttled.post_hook(throttled.currentMissingOffer, 0.01)
+    assert throttled.skippedRequotes == 1
+
+    # same levels as the rebuilt ladder
+    for side_full, side_throttled in zip(ladder(full), ladder(throttled)):
+        quantities = dict(side_throttled)
+        for price, quantity in side_full[:-2]:
+            assert isclose(quantities[price], quantity, abs_tol=TEST_ABS_TOL)
+
+    throttled.post_hook(99.0, 0.2)
+    assert throttled.skippedRequotes == 1
+    assert throttled.lastOffer is None
+    assert throttled.quoteTtl == 0.8
+
+
+def test_quantity_tolerance_requote():
+    maker = MakerReplication(
+        100, delta_fun, 1.0, 20, 0.5, requoteQuantityTolerance=1e-4
+    )
+    calls = []
+
+    def counted(x, t):
+        calls.append(t)
+        return delta_fun(x, t)
+
+    maker.deltaFun = counted
+    maker.buy_at_first_rank()
+    maker.post_hook(maker.currentMissingOffer, 1e-6)
+    assert maker.skippedRequotes == 1
+    # a single evaluation per side, at the current ttl
+    assert calls == [maker.ttl, maker.ttl]
+    maker.post_hook(maker.currentMissingOffer, 0.5)
+    assert maker.skippedRequotes == 1
+    assert maker.lastOffer is None
+
+
+def test_clone_is_independent():
+    template = get_maker(True)
+    clone = template.clone()
+    assert ladder(clone) == ladder(template)
+    assert (clone.cash, clone.asset) == (template.cash, template.asset)
+
+    clone.sell_at_first_rank()
+    clone.post_hook(clone.currentMissingOffer, 0.1)
+    assert len(template.offersLists.ranked_bids) == 20
+    assert template.asset != clone.asset
+    assert template.ttl == 1.0
+
+    # fresh clones replay the same path
+    again = template.clone()
+    again.sell_at_first_rank()
+    again.post_hook(again.currentMissingOffer, 0.1)
+    assert ladder(again) == ladder(clone)
+    assert again.levelBids.keys() == clone.levelBids.keys()
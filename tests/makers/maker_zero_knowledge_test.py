@@ -1,3 +1,4 @@
+import pytest
 from makers.maker_zero_knowledge import MakerZeroKnowledge
 from math import isclose
 
@@ -84,3 +85,49 @@ def test_ccash_and_asset_position():
     _ = maker.sell_at_first_rank()
     assert maker.cash == -198.5
     assert maker.asset == 2
+
+
+def book(maker):
+    return [(o.price, o.quantity) for o in maker.offers.ranked_bids], [
+        (o.price, o.quantity) for o in maker.offers.ranked_asks
+    ]
+
+
+def test_fast_forward_same_state_as_step_by_step():
+    from exchange_single_maker import ExchangeSingleMaker
+    from simul.path_generators import geom_brownian_path
+
+    # 4 steps a day at 150% volatility: jumps over many levels and reversals
+    path = geom_brownian_path(100, 0.0, 1.5, 60, 4, seed=7)
+    exchanges = [
+        ExchangeSingleMaker(MakerZeroKnowledge(100, 0.5, 150, 0.1, 150, 0.1), None, ff)
+        for ff in (False, True)
+    ]
+    for i, price in enumerate(path):
+        for exchange in exchanges:
+            exchange.apply_arbitrage(price, i)
+
+    slow, fast = exchanges
+    assert len(slow.transactions) > 100
+    assert [(t.price, t.quantity, t.time) for t in slow.transactions] == [
+        (t.price, t.quantity, t.time) for t in fast.transactions
+    ]
+    assert slow.maker.cash == fast.maker.cash
+    assert slow.maker.asset == fast.maker.asset
+    assert book(slow.maker) == book(fast.maker)
+
+
+def test_fast_forward_stops_at_price():
+    maker = MakerZeroKnowledge(100, 1, 5, 1, 5, 1)
+    transactions = maker.fast_forward_to_price(102)
+    assert [t.price for t in transactions] == [101, 102]
+    assert maker.offers.get_best_ask().price == 103
+    # first redeployed bid at 100, then 101
+    assert [o.price for o in maker.offers.ranked_bids][:3] == [101, 100, 99]
+    assert maker.fast_forward_to_price(101.5) == []
+
+    # a price within TOLERANCE of a level stops on it, like the exchange
+    maker = MakerZeroKnowledge(100, 0.1, 50, 1, 50, 1)
+    transactions = maker.fast_forward_to_price(101.2 * (1 + 1e-12))
+    assert len(transactions) == 12
+    assert maker.offers.get_best_ask().price == pytest.approx(101.3)
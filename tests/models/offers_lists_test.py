@@ -1,3 +1,4 @@
+import pytest
 from models.order import Order, OrderType
 from models.offers_lists import OffersLists
 import copy
@@ -54,3 +55,87 @@ def test_add_worst_ask():
 
     offersLists.add_order(Order(OrderType.SELL, 120, 1))
     assert offersLists.get_best_ask().price == 110
+
+
+def test_load_orders():
+    offersLists = OffersLists()
+    offersLists.add_order(Order(OrderType.BUY, 50, 1))
+    offersLists.load_orders(
+        [Order(OrderType.BUY, p, 1) for p in [98, 99, 97]],
+        [Order(OrderType.SELL, p, 1) for p in [102, 101]],
+    )
+    assert [o.price for o in offersLists.ranked_bids] == [99, 98, 97]
+    assert [o.price for o in offersLists.ranked_asks] == [101, 102]
+
+
+def test_copy():
+    offersLists = OffersLists()
+    offersLists.add_order(Order(OrderType.BUY, 99, 1))
+    offersLists.add_order(Order(OrderType.SELL, 101, 2))
+    other = offersLists.copy()
+    assert other.get_best_bid() == offersLists.get_best_bid()
+
+    other.get_best_ask().quantity = 3
+    other.pop_best_bid()
+    assert offersLists.get_best_ask().quantity == 2
+    assert offersLists.has_bid()
+
+
+def walk_depth(orders, price, sign):
+    taken = [o for o in orders if sign * o.price <= sign * price]
+    return sum(o.quantity for o in taken), sum(o.quantity * o.price for o in taken)
+
+
+def test_depth_index():
+    offersLists = OffersLists()
+    for i in range(1, 6):
+        offersLists.add_order(Order(OrderType.SELL, 100 + i, i))
+        offersLists.add_order(Order(OrderType.BUY, 100 - i, 1))
+
+    assert offersLists.depth_to_price(OrderType.SELL, 100) == (0, 0)
+    assert offersLists.depth_to_price(OrderType.SELL, 102.5) == (3, 101 + 2 * 102)
+    assert offersLists.orders_to_price(OrderType.SELL, 102.5) == 2
+    assert offersLists.depth_to_price(OrderType.BUY, 97) == (3, 99 + 98 + 97)
+    assert offersLists.price_for_depth(OrderType.SELL, 2) == (102, pytest.approx(101.5))
+    assert offersLists.price_for_depth(OrderType.SELL, 16) is None
+
+    # pops keep the index, other changes rebuild it
+    version = offersLists.version
+    offersLists.pop_best_ask()
+    assert offersLists.version > version
+    offersLists.add_order(Order(OrderType.SELL, 101.5, 1))
+    offersLists.increase_quantity(offersLists.ranked_asks[-1], 1)
+    offersLists.pop_best_bid()
+    for price in (101, 102, 103.5, 110):
+        assert offersLists.depth_to_price(OrderType.SELL, price) == pytest.approx(
+            walk_depth(offersLists.ranked_asks, price, 1)
+        )
+    for price in (100, 98, 96.5, 90):
+        assert offersLists.depth_to_price(OrderType.BUY, price) == pytest.approx(
+            walk_depth(offersLists.ranked_bids, price, -1)
+        )
+    assert offersLists.price_for_depth(OrderType.SELL, 3) == (
+        102,
+        pytest.approx((101.5 + 2 * 102) / 3),
+    )
+
+
+def test_changes():
+    offersLists = OffersLists()
+    bid = Order(OrderType.BUY, 99, 1)
+    ask = Order(OrderType.SELL, 101, 1)
+    offersLists.add_order(bid)
+    # nobody followed the log yet
+    assert offersLists.pop_changes() is None
+
+    offersLists.add_order(ask)
+    offersLists.pop_best_bid()
+    assert offersLists.pop_changes() == [(ask.id, ask), (bid.id, None)]
+    assert offersLists.pop_changes() == []
+
+    offersLists.clear()
+    offersLists.add_order(bid)
+    assert offersLists.pop_changes() == [(None, None), (bid.id, bid)]
+
+    offersLists.drop_changes()
+    assert offersLists.pop_changes() is None
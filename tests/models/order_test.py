@@ -1,3 +1,4 @@
+import copy
 import pytest
 from models.order import OrderType, Order
 
@@ -34,3 +35,28 @@ def test_order_comparaison_buy_sell():
 
     assert Order(OrderType.BUY, 100, 1) < Order(OrderType.SELL, 101, 1)
     assert Order(OrderType.SELL, 100, 1) < Order(OrderType.BUY, 101, 1)
+
+
+def test_order_ids_and_lazy_uuid():
+    first, second = Order(OrderType.BUY, 100, 1), Order(OrderType.BUY, 100, 1)
+
+    assert second.id > first.id
+    assert first != second
+    assert first._uuid is None
+    assert first.uuid == first.uuid
+    assert first.uuid != second.uuid
+
+    # equality is on the id only
+    copied = copy.copy(first)
+    copied.quantity = 2
+    assert copied == first
+
+
+def test_transaction_refers_to_order_id():
+    from models.transaction import take_maker_order
+
+    order = Order(OrderType.SELL, 100, 2)
+    transaction = take_maker_order(order, 1.0)
+
+    assert transaction.order_id == order.id
+    assert transaction.quantity == 2
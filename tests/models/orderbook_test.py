@@ -0,0 +1,57 @@
+import pytest
+from models.order import Order, OrderType
+from models.orderbook import OrderBook, price_to_tick, tick_to_price
+from models.tick_book import TickOffersLists
+
+
+def test_ticks():
+    assert price_to_tick(100.1, 0.1) == 1001
+    assert tick_to_price(1001, 0.1) == pytest.approx(100.1)
+
+
+def test_append_maker_order():
+    book = OrderBook(0.5)
+    book.append_maker_order(Order(OrderType.BUY, 99.5, 1))
+    book.append_maker_order(Order(OrderType.BUY, 99.0000001, 2))
+    book.append_maker_order(Order(OrderType.SELL, 100.5, 1))
+    book.append_maker_order(Order(OrderType.SELL, 100.3, 1))
+
+    assert book.best_bid_tick() == 199
+    assert book.best_ask_tick() == 201
+    # the tick is the level key, the order keeps its price
+    assert book.bids.peekitem(0)[0] == 198
+    assert book.get_worst_bid().price == 99.0000001
+    assert [o.price for o in book.ranked_asks] == [100.5]
+    with pytest.raises(Exception):
+        book.append_maker_order(Order(OrderType.BUY, 99.5, 1))
+
+
+def test_price_time_priority():
+    book = OrderBook(0.5)
+    first = Order(OrderType.SELL, 101, 1)
+    second = Order(OrderType.SELL, 101, 2)
+    better = Order(OrderType.SELL, 100.5, 3)
+    for order in (first, second, better):
+        book.add_order(order)
+
+    assert book.ranked_asks == [better, first, second]
+    book.remove_order(better)
+    assert book.pop_best_ask() is first
+    assert book.pop_best_ask() is second
+    assert not book.has_ask()
+    with pytest.raises(ValueError):
+        book.remove_order(first)
+
+
+def test_tick_book_levels():
+    levels = TickOffersLists(0.3)
+    levels.add_order(Order(OrderType.SELL, 100.2, 1))
+    level = levels.get_best_ask()
+
+    book = OrderBook(0.1)
+    assert book.add_order(level) == 1002
+    assert book._tickRatios == {0.3: 3}
+    book.remove_order(level)
+    assert not book.has_ask()
+
+    assert OrderBook(0.2).add_order(level) is None
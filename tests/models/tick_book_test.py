@@ -0,0 +1,207 @@
+from exchange_single_maker import ExchangeSingleMaker
+from makers.delta_functions import CallDelta
+from makers.maker_delta import MakerDelta
+from makers.maker_replication import MakerReplication
+from makers.maker_zero_knowledge import MakerZeroKnowledge
+from models.order import Order, OrderType
+from models.tick_book import TickOffersLists
+from simul.path_generators import geom_brownian_path
+import pytest
+
+
+def test_best_levels():
+    book = TickOffersLists(0.5, capacity=8)
+    assert not book.has_bid() and not book.has_ask()
+
+    book.add_order(Order(OrderType.BUY, 99, 1))
+    book.add_order(Order(OrderType.BUY, 99.5, 2))
+    book.add_order(Order(OrderType.BUY, 99, 0.5))
+    book.add_order(Order(OrderType.SELL, 101, 1))
+    book.add_order(Order(OrderType.SELL, 100.5, 3))
+    assert book.get_best_bid().price == 99.5
+    assert book.get_best_ask().price == 100.5
+    assert book.midPrice == 100
+    assert [(o.price, o.quantity) for o in book.ranked_bids] == [(99.5, 2), (99, 1.5)]
+
+    order = book.pop_best_bid()
+    assert (order.order_type, order.price, order.quantity) == (OrderType.BUY, 99.5, 2)
+    assert book.get_best_bid().price == 99
+    book.get_best_bid().quantity += 1
+    assert book.pop_best_bid().quantity == 2.5
+    assert not book.has_bid()
+
+    book.remove_order(Order(OrderType.SELL, 100.5, 3))
+    assert book.get_best_ask().price == 101
+    with pytest.raises(ValueError):
+        book.remove_order(Order(OrderType.SELL, 100.5, 3))
+
+
+def test_growth_keeps_levels():
+    book = TickOffersLists(1, capacity=4)
+    book.add_order(Order(OrderType.BUY, 100, 1))
+    level = book.get_best_bid()
+    book.add_order(Order(OrderType.SELL, 150, 1))
+    book.add_order(Order(OrderType.BUY, 20, 2))
+    assert len(book.bids) >= 131
+    assert level.quantity == 1
+    assert [o.price for o in book.ranked_bids] == [100, 20]
+    assert book.get_best_ask().price == 150
+
+    book.clear()
+    book.load_orders([Order(OrderType.BUY, 5000, 1)], [Order(OrderType.SELL, 5001, 1)])
+    assert book.get_best_bid().price == 5000
+    assert book.get_best_ask().price == 5001
+
+
+def run(maker, path):
+    exchange = ExchangeSingleMaker(maker, fastForward=False)
+    for i, price in enumerate(path):
+        exchange.apply_arbitrage(price, i)
+    return [(t.price, t.quantity) for t in exchange.transactions], maker
+
+
+def test_makers_on_tick_book():
+    path = geom_brownian_path(100, 0.0, 0.5, 60, 4, seed=3)
+
+    txs1, maker1 = run(MakerZeroKnowledge(100, 0.5, 100, 0.1, 100, 0.1), path)
+    txs2, maker2 = run(
+        MakerZeroKnowledge(100, 0.5, 100, 0.1, 100, 0.1, TickOffersLists(0.5)), path
+    )
+    assert len(txs1) > 50
+    assert txs1 == txs2
+    assert maker1.asset == pytest.approx(maker2.asset)
+
+    curve = lambda x: 100 * 100 / x
+    txs1, maker1 = run(MakerDelta(100, curve, 20, 0.5, incrementalRequote=True), path)
+    txs2, maker2 = run(
+        MakerDelta(
+            100,
+            curve,
+            20,
+            0.5,
+            incrementalRequote=True,
+            offersLists=TickOffersLists(0.5),
+        ),
+        path,
+    )
+    assert len(txs1) > 50
+    assert txs1 == txs2
+    assert maker1.cash == pytest.approx(maker2.cash)
+
+
+def test_depth_index():
+    book = TickOffersLists(0.5, capacity=8)
+    for i in range(1, 6):
+        book.add_order(Order(OrderType.SELL, 100 + i, i))
+        book.add_order(Order(OrderType.BUY, 100 - i, 1))
+
+    assert book.depth_to_price(OrderType.SELL, 102.5) == (3, 101 + 2 * 102)
+    book.pop_best_bid()
+    assert book.depth_to_price(OrderType.BUY, 97) == (2, 98 + 97)
+    book.get_best_ask().quantity += 1
+    assert book.price_for_depth(OrderType.SELL, 2) == (101, 101)
+
+
+def test_off_grid_prices_rejected():
+    book = TickOffersLists(0.5)
+    book.add_order(Order(OrderType.BUY, 99, 1))
+    with pytest.raises(ValueError):
+        book.add_order(Order(OrderType.BUY, 98.8, 1))
+    with pytest.raises(ValueError):
+        book.load_orders([Order(OrderType.BUY, 98.8, 1)], [])
+    # nothing was loaded
+    assert [o.price for o in book.ranked_bids] == [99]
+
+
+def test_full_rebuild_maker_on_grid():
+    # a full rebuild re-centers on the arbitrage price: the grid of the book
+    # must hold every price of the ladder
+    prices = [99.3, 100.1, 98.7, 98.7, 101.5]
+    txs1, maker1 = run(MakerDelta(100, lambda x: 100 * 100 / x, 5, 0.3), prices)
+    txs2, maker2 = run(
+        MakerDelta(
+            100, lambda x: 100 * 100 / x, 5, 0.3, offersLists=TickOffersLists(0.1)
+        ),
+        prices,
+    )
+    assert len(txs1) > 5
+    assert len(txs1) == len(txs2)
+    for tx1, tx2 in zip(txs1, txs2):
+        assert tx1 == pytest.approx(tx2)
+    assert len(maker2.offers.ranked_asks) == len(maker1.offers.ranked_asks)
+    assert maker1.cash == pytest.approx(maker2.cash)
+
+    # raw arbitrage prices: the re-quoting mid is rounded to the book grid
+    path = geom_brownian_path(100, 0.0, 0.5, 30, 4, seed=7)
+    for tickSize in (0.5, 0.01, 1e-4):
+        txs, maker = run(
+            MakerReplication(
+                100,
+                CallDelta(100, 0.2),
+                1000,
+                10,
+                4 * tickSize,
+                offersLists=TickOffersLists(tickSize),
+            ),
+            path,
+        )
+        assert len(txs) > 5
+        mid = maker.currentMissingOffer
+        assert mid == pytest.approx(round(mid / tickSize) * tickSize)
+
+    # levels would be off the grid
+    with pytest.raises(ValueError):
+        MakerDelta(
+            100, lambda x: 100 * 100 / x, 5, 0.3, offersLists=TickOffersLists(0.5)
+        )
+    with pytest.raises(ValueError):
+        MakerDelta(
+            100,
+            lambda x: 100 * 100 / x,
+            5,
+            tickQuantity=1,
+            offersLists=TickOffersLists(0.5),
+        )
+
+
+def test_recenter_and_scan():
+    book = TickOffersLists(1, capacity=64)
+    book.add_order(Order(OrderType.SELL, 100, 1))
+    for price in range(101, 1000):
+        book.pop_best_ask()
+        book.add_order(Order(OrderType.SELL, price, 1))
+    # drifting prices re-center the arrays instead of doubling them
+    assert len(book.bids) == 64
+
+    book.load_orders([Order(OrderType.BUY, 10, 1)], [Order(OrderType.SELL, 5000, 1)])
+    book.add_order(Order(OrderType.BUY, 4999, 1))
+    assert book.pop_best_bid().price == 4999
+    assert book.get_best_bid().price == 10
+
+
+def test_level_ids():
+    book = TickOffersLists(0.5)
+    book.pop_changes()
+    book.add_order(Order(OrderType.SELL, 101, 1))
+    book.add_order(Order(OrderType.SELL, 101, 2))
+    level = book.get_best_ask()
+    [(levelId, view)] = book.pop_changes()
+    # views read the level: the second order is seen without a new entry
+    assert levelId == view.id == level.id
+    assert view.quantity == 3
+
+    # the popped order is the level seen so far
+    assert book.pop_best_ask().id == level.id
+    assert book.pop_changes() == [(level.id, None)]
+
+    # a refilled level ranks as a new order
+    book.add_order(Order(OrderType.SELL, 101, 1))
+    refilled = book.get_best_ask()
+    assert refilled.id != level.id
+    book.remove_order(refilled)
+    book.add_order(Order(OrderType.SELL, 101, 1))
+    assert book.get_best_ask().id not in (level.id, refilled.id)
+
+    book.clear()
+    assert book.pop_changes()[-1] == (None, None)
+    assert not book._levelIds
@@ -0,0 +1,61 @@
+from simul.path_bank import PathBank, cached_geom_brownian_paths
+from simul.path_generators import geom_brownian_paths
+import numpy as np
+import os
+
+
+def test_get_or_create_memmap(tmp_path):
+    bank = PathBank(str(tmp_path))
+    params = {"a": 1}
+    calls = []
+
+    def generator():
+        calls.append(1)
+        return np.arange(12.0).reshape(3, 4)
+
+    first = bank.get_or_create(params, generator)
+    second = bank.get_or_create(params, generator)
+    assert len(calls) == 1
+    assert isinstance(second, np.memmap)
+    assert np.array_equal(first, second)
+    assert bank.get({"a": 2}) is None
+
+
+def test_cached_geom_brownian_paths(tmp_path):
+    bank = PathBank(str(tmp_path))
+    paths = cached_geom_brownian_paths(bank, 100, 0.1, 0.2, 10, 5, seed=3)
+    assert np.array_equal(paths, geom_brownian_paths(100, 0.1, 0.2, 10, 5, seed=3))
+    assert len([f for f in os.listdir(tmp_path) if f.endswith(".npy")]) == 1
+
+    cached_geom_brownian_paths(bank, 100, 0.1, 0.2, 10, 5)
+    assert len([f for f in os.listdir(tmp_path) if f.endswith(".npy")]) == 1
+
+
+def test_lru_eviction(tmp_path):
+    data = np.zeros((10, 100))
+    bank = PathBank(str(tmp_path), maxBytes=int(2.5 * data.nbytes))
+
+    bank.put({"k": 0}, data)
+    bank.put({"k": 1}, data)
+    os.utime(bank.file_of({"k": 0}), (0, 0))
+    os.utime(bank.file_of({"k": 1}), (1, 1))
+    # hit refreshes k=0, so k=1 becomes the least recently used
+    assert bank.get({"k": 0}) is not None
+
+    bank.put({"k": 2}, data)
+    assert bank.get({"k": 1}) is None
+    assert bank.get({"k": 0}) is not None
+    assert bank.get({"k": 2}) is not None
+    assert bank.size() <= bank.maxBytes
+
+
+def test_sidecar_and_clear(tmp_path):
+    bank = PathBank(str(tmp_path))
+    bank.put({"k": 0}, np.zeros(3))
+    assert os.path.exists(bank.file_of({"k": 0})[:-4] + ".json")
+    assert not [f for f in os.listdir(tmp_path) if f.endswith(".tmp")]
+
+    # temp file left by an interrupted write
+    open(os.path.join(tmp_path, "x.tmp"), "w").close()
+    bank.clear()
+    assert os.listdir(tmp_path) == []
@@ -1,6 +1,7 @@
 from simul.path_generators import *
 import numpy as np
 from math import isclose
+import warnings
 
 def test_geom_brownian_path():
 
@@ -17,4 +18,189 @@ def test_geom_brownian_path():
     assert isclose(mean_dlog, (drift - 0.5 * volat**2)/252.0, rel_tol=0.5)
 
     std_dlog = np.diff(np.log(sim3)).std()
-    assert isclose(std_dlog, volat * sqrt(1/252.0), rel_tol=1e-2)
\ No newline at end of file
+    assert isclose(std_dlog, volat * sqrt(1/252.0), rel_tol=1e-2)
+
+def test_geom_brownian_paths_shape_and_first_row():
+    paths = geom_brownian_paths(100, 0.1, 0.2, 10, 4, numStepPerDay=2, seed=7)
+    assert paths.shape == (4, 20)
+    assert (paths[:, 0] == 100).all()
+
+    single = geom_brownian_path(100, 0.1, 0.2, 10, 2, seed=7)
+    assert np.array_equal(paths[0], single)
+
+
+def test_geom_brownian_paths_chunk_invariant():
+    full = geom_brownian_paths(100, 0.1, 0.2, 50, 7, seed=3)
+    chunked = geom_brownian_paths(100, 0.1, 0.2, 50, 7, seed=3, chunkSize=3)
+    assert np.array_equal(full, chunked)
+
+    blocks = list(iter_geom_brownian_paths(100, 0.1, 0.2, 50, 7, 2, seed=3))
+    assert [len(b) for b in blocks] == [2, 2, 2, 1]
+    assert np.array_equal(full, np.concatenate(blocks))
+
+
+def test_geom_brownian_paths_float32():
+    paths = geom_brownian_paths(100, 0.1, 0.4, 252, 2000, seed=1, dtype=np.float32)
+    assert paths.dtype == np.float32
+
+    std_dlog = np.diff(np.log(paths), axis=1).std()
+    assert isclose(std_dlog, 0.4 * sqrt(1 / 252.0), rel_tol=1e-2)
+
+
+def test_geom_brownian_paths_antithetic():
+    paths = geom_brownian_paths(100, 0.1, 0.2, 20, 6, seed=5, sampling="antithetic")
+    drift = (0.1 - 0.5 * 0.2**2) / 252.0 * np.arange(20)
+    log_sum = np.log(paths[0::2] / 100) + np.log(paths[1::2] / 100)
+    assert np.allclose(log_sum, 2 * drift)
+
+    ids = path_pair_ids(6, "antithetic")
+    assert list(ids) == [0, 0, 1, 1, 2, 2]
+
+
+def test_geom_brownian_paths_sobol_bridge():
+    paths = geom_brownian_paths(
+        100, 0.0, 0.2, 16, 1024, seed=11, sampling="sobol", brownianBridge=True
+    )
+    log_ret = np.log(paths[:, -1] / 100)
+    t = 15 / 252.0
+    assert isclose(log_ret.mean(), -0.5 * 0.2**2 * t, abs_tol=1e-4)
+    assert isclose(log_ret.std(), 0.2 * sqrt(t), rel_tol=1e-2)
+
+
+def test_sobol_any_number_of_paths():
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        paths = geom_brownian_paths(
+            100, 0.0, 0.2, 16, 100, seed=11, chunkSize=30, sampling="sobol"
+        )
+    assert paths.shape == (100, 16)
+
+
+def test_brownian_bridge_increments_variance():
+    rng = np.random.default_rng(0)
+    dw = brownian_bridge_increments(rng.standard_normal((200000, 5)))
+    assert np.allclose(dw.var(axis=0), 1, atol=2e-2)
+    assert np.allclose(np.corrcoef(dw.T), np.eye(5), atol=2e-2)
+
+
+def test_paired_mean_stderr():
+    mean, stderr = paired_mean_stderr([1.0, 3.0, 2.0, 2.0], [0, 0, 1, 1])
+    assert mean == 2.0
+    assert stderr == 0.0
+
+
+def test_philox_path_source_random_access():
+    source = PhiloxPathSource(100, 0.1, 0.3, 50, 2, baseSeed=42, blockSize=8)
+    assert len(source) == 100
+
+    full = source.paths(0, 6)
+    assert full.shape == (6, 100)
+    assert (full[:, 0] == 100).all()
+
+    # workers on disjoint ranges reproduce the single run
+    assert np.array_equal(np.vstack([source.paths(0, 2), source.paths(2, 6)]), full)
+    assert np.array_equal(source.path(4), full[4])
+
+    # slices of steps, across block boundaries
+    for start, stop in [(0, 5), (7, 9), (13, 61), (95, 100)]:
+        assert np.array_equal(source.path(3, start, stop), full[3, start:stop])
+
+    other = PhiloxPathSource(100, 0.1, 0.3, 50, 2, baseSeed=43, blockSize=8)
+    assert not np.array_equal(other.path(0), full[0])
+
+
+def test_philox_path_source_distribution():
+    source = PhiloxPathSource(100, 0.0, 0.4, 33, baseSeed=1, blockSize=4)
+    dlog = np.diff(np.log(source.paths(0, 3000)), axis=1)
+    assert isclose(dlog.std(), 0.4 * sqrt(1 / 252.0), rel_tol=1e-2)
+    # increments stay independent across block boundaries
+    corr = np.corrcoef(dlog[:, 2], dlog[:, 3])[0, 1]
+    assert abs(corr) < 0.05
+
+
+def test_iter_geom_brownian_path_matches_full_path():
+    full = geom_brownian_path(100, 0.1, 0.3, 100, 3, seed=9)
+    chunks = list(iter_geom_brownian_path(100, 0.1, 0.3, 100, 64, 3, seed=9))
+    assert [len(c) for c in chunks] == [64] * 4 + [44]
+    assert np.array_equal(np.concatenate(chunks), full)
+
+
+def test_bridge_cross_probability():
+    assert bridge_cross_probability(100, 102, 101, 0.2, 1 / 252) == 1.0
+    far = bridge_cross_probability(100, 100, 150, 0.2, 1 / 252)
+    near = bridge_cross_probability(100, 100, 100.5, 0.2, 1 / 252)
+    assert 0 <= far < near < 1
+
+
+def test_brownian_bridge_fill():
+    rng = np.random.default_rng(4)
+    fills = np.array(
+        [brownian_bridge_fill(100, 110, 4, 0.3, 0.01, rng) for _ in range(20000)]
+    )
+    assert fills.shape == (20000, 3)
+    expected = np.log(100) + np.array([0.25, 0.5, 0.75]) * np.log(1.1)
+    assert np.allclose(np.log(fills).mean(axis=0), expected, atol=1e-3)
+
+
+def test_path_sources_interface():
+    sources = [
+        GeomBrownianSource(100, 0.1, 0.2, 30, 2),
+        HestonSource(100, 0.1, 0.04, 2.0, 0.04, 0.3, -0.7, 30, 2),
+        MertonJumpSource(100, 0.1, 0.2, 5.0, -0.05, 0.1, 30, 2),
+        PhiloxPathSource(100, 0.1, 0.2, 30, 2, baseSeed=0),
+    ]
+    for source in sources:
+        paths = source.generate(10, seed=8)
+        assert paths.shape == (10, 60)
+        assert (paths[:, 0] == 100).all()
+        assert (paths > 0).all()
+        # chunking does not change the paths
+        chunks = list(source.iter_generate(10, 3, seed=8))
+        assert np.array_equal(np.concatenate(chunks), paths)
+
+
+def test_heston_without_vol_of_vol_is_gbm():
+    source = HestonSource(100, 0.0, 0.16, 1.0, 0.16, 0.0, 0.0, 252)
+    dlog = np.diff(np.log(source.generate(2000, seed=1)), axis=1)
+    assert isclose(dlog.std(), 0.4 * sqrt(1 / 252.0), rel_tol=1e-2)
+
+
+def test_merton_jump_drift_is_compensated():
+    source = MertonJumpSource(100, 0.1, 0.2, 10.0, -0.05, 0.05, 252)
+    terminal = source.generate(20000, seed=3)[:, -1]
+    assert isclose(terminal.mean(), 100 * np.exp(0.1 * 251 / 252.0), rel_tol=1e-2)
+
+
+def test_stationary_bootstrap_blocks():
+    returns = np.arange(10) / 1000.0
+
+    # never restarting: each path is one circular block of returns
+    source = BootstrapSource(returns, 100, 25, meanBlockLength=1e12)
+    paths = source.generate(5, seed=2)
+    assert paths.shape == (5, 25)
+    assert (paths[:, 0] == 100).all()
+    idx = np.rint(np.diff(np.log(paths), axis=1) * 1000).astype(int)
+    assert ((np.diff(idx, axis=1) % 10) == 1).all()
+
+    # chunking does not change the paths
+    chunks = list(source.iter_generate(5, 2, seed=2))
+    assert np.array_equal(np.concatenate(chunks), paths)
+
+
+def test_stationary_bootstrap_from_npy(tmp_path):
+    rng = np.random.default_rng(0)
+    returns = rng.normal(0, 0.01, 1000)
+    filename = str(tmp_path / "returns.npy")
+    np.save(filename, returns)
+
+    source = BootstrapSource(filename, 100, 50, meanBlockLength=1)
+    dlog = np.diff(np.log(source.generate(200, seed=1)), axis=1)
+    assert (np.abs(dlog[:, :, None] - returns).min(axis=2) < 1e-9).all()
+    assert isclose(dlog.std(), returns.std(), rel_tol=5e-2)
+
+    # the key follows the content of the file, not its name
+    key = source.params()
+    assert key == BootstrapSource(returns, 100, 50, 1).params()
+    del source
+    np.save(filename, returns[::-1])
+    assert BootstrapSource(filename, 100, 50, 1).params() != key
@@ -0,0 +1,59 @@
+from simul.tick_replay import SECONDS_PER_YEAR, TickReplaySource, convert_to_npy
+import numpy as np
+import pandas as pd
+import pytest
+
+
+def write_ticks(tmp_path):
+    times = np.array([0.5, 1.0, 1.5, 2.2, 2.9, 3.1, 7.5, 7.6, 8.1, 9.0])
+    prices = 100 + np.arange(len(times), dtype=float)
+    filename = str(tmp_path / "ticks.csv")
+    pd.DataFrame({"time": times, "price": prices, "volume": 1}).to_csv(
+        filename, index=False
+    )
+    return filename, times, prices
+
+
+def test_csv_replay_by_chunks(tmp_path):
+    filename, times, prices = write_ticks(tmp_path)
+    blocks = list(TickReplaySource(filename, chunkSize=4))
+    assert [len(t) for t, _ in blocks] == [4, 4, 2]
+    assert np.array_equal(np.concatenate([t for t, _ in blocks]), times)
+    assert np.array_equal(np.concatenate([p for _, p in blocks]), prices)
+
+
+def test_resample_across_chunks(tmp_path):
+    filename, _, _ = write_ticks(tmp_path)
+    for chunkSize in [1, 3, 4, 100]:
+        blocks = list(TickReplaySource(filename, chunkSize=chunkSize, resampleStep=2))
+        times = np.concatenate([t for t, _ in blocks])
+        prices = np.concatenate([p for _, p in blocks])
+        assert list(times) == [2, 4, 8, 10]
+        assert list(prices) == [102, 105, 107, 109]
+
+
+def test_npy_replay(tmp_path):
+    filename, times, prices = write_ticks(tmp_path)
+    npy = convert_to_npy(
+        TickReplaySource(filename, chunkSize=3), str(tmp_path / "ticks.npy")
+    )
+    blocks = list(TickReplaySource(npy, chunkSize=6))
+    assert [len(t) for t, _ in blocks] == [6, 4]
+    assert np.array_equal(np.concatenate([p for _, p in blocks]), prices)
+
+
+def test_parquet_replay(tmp_path):
+    pytest.importorskip("pyarrow")
+    _, times, prices = write_ticks(tmp_path)
+    filename = str(tmp_path / "ticks.parquet")
+    pd.DataFrame({"time": times, "price": prices}).to_parquet(filename)
+    blocks = list(TickReplaySource(filename, chunkSize=4))
+    assert np.array_equal(np.concatenate([p for _, p in blocks]), prices)
+
+
+def test_times_in_years(tmp_path):
+    filename, times, _ = write_ticks(tmp_path)
+    blocks = list(TickReplaySource(filename, chunkSize=4, inYears=True))
+    years = np.concatenate([t for t, _ in blocks])
+    assert years[0] == 0
+    assert years * SECONDS_PER_YEAR == pytest.approx(times - times[0])
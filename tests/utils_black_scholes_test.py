@@ -0,0 +1,40 @@
+import numpy as np
+from scipy.stats import norm
+import utils_black_scholes as bs
+
+
+def reference(S, K, T, r, sigma):
+    d1 = (np.log(S / K) + (r + 0.5 * sigma**2) * T) / (sigma * np.sqrt(T))
+    d2 = d1 - sigma * np.sqrt(T)
+    return S * norm.cdf(d1) - K * np.exp(-r * T) * norm.cdf(d2), norm.cdf(d1)
+
+
+def test_call_price_and_delta():
+    S = np.linspace(50, 150, 11)
+    price, delta = reference(S, 100, 0.5, 0.02, 0.3)
+    assert np.allclose(bs.call_price(S, 100, 0.5, 0.02, 0.3), price)
+    assert np.allclose(bs.call_delta(S, 100, 0.5, 0.02, 0.3), delta)
+    assert np.isclose(bs.call_delta(110, 100, 0.5, 0.02, 0.3), delta[6])
+
+
+def test_call_greeks_finite_differences():
+    S, T, h = np.array([80.0, 100.0, 120.0]), 0.5, 1e-4
+    g = bs.call_greeks(S, 100, T, 0.02, 0.3)
+    up = bs.call_greeks(S + h, 100, T, 0.02, 0.3)
+    down = bs.call_greeks(S - h, 100, T, 0.02, 0.3)
+    assert np.allclose(g.delta, (up.price - down.price) / (2 * h), atol=1e-6)
+    assert np.allclose(g.gamma, (up.delta - down.delta) / (2 * h), atol=1e-6)
+
+    later = bs.call_greeks(S, 100, T - h, 0.02, 0.3)
+    assert np.allclose(g.theta, (later.price - g.price) / h, atol=1e-3)
+
+
+def test_expiry_without_nans():
+    S = np.array([90.0, 100.0, 110.0])
+    g = bs.call_greeks(S, 100, 0, 0.02, 0.3)
+    assert np.array_equal(g.price, [0, 0, 10])
+    assert np.array_equal(g.delta, [0, 0.5, 1])
+    assert np.array_equal(g.gamma, [0, 0, 0])
+    assert not np.isnan(g.theta).any()
+    assert bs.call_delta(110, 100, 0, 0, 0.2) == 1
+    assert bs.call_delta(90, 100, 0.5, 0, 0) == 0
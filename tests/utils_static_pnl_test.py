@@ -0,0 +1,40 @@
+import numpy as np
+from exchange_single_maker import ExchangeSingleMaker
+from makers.delta_functions import CallDelta, ConstantNotional, FixedTtl
+from makers.maker_delta import MakerDelta
+from simul.path_generators import geom_brownian_paths
+from utils_static_pnl import static_path_pnl, static_terminal_pnl, validate_static_pnl
+
+
+def test_single_jump_is_exact():
+    curve = ConstantNotional(1e4)
+    prices = np.array([80.0, 90.3, 99.9, 100.0, 100.2, 103.7, 108.0, 130.0])
+    result = static_terminal_pnl(curve, 100, prices, 0.5, 20)
+
+    for price, cash, asset in zip(prices, result.cash, result.asset):
+        maker = MakerDelta(100, curve, 20, 0.5)
+        ExchangeSingleMaker(maker).apply_arbitrage(price, 1)
+        assert np.isclose(cash, maker.cash, rtol=1e-12)
+        assert np.isclose(asset, maker.asset, rtol=1e-12)
+
+
+def test_monotone_path_matches_closed_form():
+    curve = FixedTtl(CallDelta(100, 0.2), 1)
+    paths = np.array([np.linspace(100, 80, 50), np.linspace(100, 121, 50)])
+    result = static_path_pnl(curve, paths, 0.5)
+    closed = static_terminal_pnl(curve, 100, paths[:, -1], 0.5)
+    assert np.allclose(result.pnl, closed.pnl, rtol=1e-12)
+
+    # a round trip earns the spread of the crossed levels
+    back = np.concatenate([paths[1], paths[1][::-1]])[None, :]
+    gamma = curve(np.arange(100, 121, 0.5)) - curve(np.arange(100.5, 121.5, 0.5))
+    assert np.isclose(static_path_pnl(curve, back, 0.5).pnl[0], 0.5 * gamma.sum())
+
+
+def test_validate_against_simulation():
+    paths = geom_brownian_paths(100, 0.0, 0.3, 50, 4, numStepPerDay=4, seed=1)
+    analytic, simulated = validate_static_pnl(
+        FixedTtl(CallDelta(100, 0.2), 1), paths, 0.5, 40
+    )
+    # the maker re-centers on arbitrage prices, not on the grid
+    assert np.max(np.abs(analytic - simulated)) < 0.05 * np.mean(np.abs(simulated))
@@ -1,5 +1,6 @@
 from plotly.subplots import make_subplots
 import math
+import os
 from typing import List
 import numpy as np
 import pandas as pd
@@ -9,16 +10,20 @@ import streamlit as st
 import utils as ut
 import utils_black_scholes as bs
 from exchange_single_maker import ExchangeSingleMaker
+from makers.delta_functions import CallDelta, FixedTtl
+from makers.maker import Maker
 from makers.maker_delta import MakerDelta
 from makers.maker_replication import MakerReplication
 from models.transaction import Transaction
-from simul.path_generators import geom_brownian_path
+from simul.path_bank import PathBank, cached_geom_brownian_paths
+from simul.path_generators import PhiloxPathSource
 from sklearn.preprocessing import KBinsDiscretizer
 from mlinsights.mlmodel import PiecewiseRegressor
 
 # CONSTANTS -------------------------------------------------------------------
 
 NB_DAY_PER_YEAR = 252
+PATH_BANK = PathBank(os.environ.get("MMPROFILER_PATH_BANK", ".path_bank"))
 
 # STREAMLIT CONFIG ------------------------------------------------------------
 
@@ -176,9 +181,32 @@ i_time_delta = 1 / (float(NB_DAY_PER_YEAR) * float(i_nb_step_day))
 
 
 def simulate_path(seed=None):
-    return geom_brownian_path(
-        i_px_init, i_yield, i_volat, i_nb_day, i_nb_step_day, NB_DAY_PER_YEAR, seed
+    return cached_geom_brownian_paths(
+        PATH_BANK,
+        i_px_init,
+        i_yield,
+        i_volat,
+        i_nb_day,
+        1,
+        i_nb_step_day,
+        NB_DAY_PER_YEAR,
+        seed,
+    )[0]
+
+
+def simulate_paths(firstIndex: int, numPaths: int):
+    """Monte Carlo paths firstIndex..firstIndex+numPaths-1, reproducible from
+    the diffusion seed whatever the batching."""
+    source = PhiloxPathSource(
+        i_px_init,
+        i_yield,
+        i_volat,
+        i_nb_day,
+        i_nb_step_day,
+        NB_DAY_PER_YEAR,
+        baseSeed=i_seed,
     )
+    return source.paths(firstIndex, firstIndex + numPaths)
 
 
 i_prices = simulate_path(i_seed)
@@ -270,7 +298,7 @@ def delta_fun(x: float, t: float) -> float:
 
 
 char_prices = list(range(math.floor(i_px_init * 0.5), math.ceil(1.5 * i_px_init)))
-char_deltas = [delta_fun(x, i_mat) for x in char_prices]
+char_deltas = delta_fun(np.array(char_prices, dtype=float), i_mat)
 fig = px.line(x=char_prices, y=char_deltas)
 fig.update_layout(showlegend=False)
 
@@ -283,7 +311,7 @@ dlt3d_dt = pd.DataFrame(char_prices[::5], columns=["price"]).merge(
     pd.DataFrame(char_time, columns=["time"]), how="cross"
 )
 dlt3d_dt["time"] = dlt3d_dt["time"] / NB_DAY_PER_YEAR
-dlt3d_dt["delta"] = dlt3d_dt.apply(lambda r: delta_fun(r["price"], r["time"]), axis=1)
+dlt3d_dt["delta"] = delta_fun(dlt3d_dt["price"].to_numpy(), dlt3d_dt["time"].to_numpy())
 
 dlt3d_dt = pd.pivot(dlt3d_dt, index="price", columns="time", values="delta")
 fig = go.Figure(data=[go.Surface(z=dlt3d_dt, x=dlt3d_dt.index, y=char_time)])
@@ -332,10 +360,11 @@ def build_maker(use_latest_price: bool):
 
     mat_float = float(i_nb_day) * float(i_mat_ratio) / float(NB_DAY_PER_YEAR)
 
+    repli_delta = CallDelta(i_strike, i_volat_repli, i_rate_repli)
     if i_maker_repli:
         maker = MakerReplication(
             initMidPrice=p0,
-            deltaFunction=lambda x, t: -delta_fun(x, t),
+            deltaFunction=repli_delta,
             maturity=i_mat,
             numOneWayOffers=i_nb_offers,
             tickInterval=i_tick_width,
@@ -344,7 +373,7 @@ def build_maker(use_latest_price: bool):
     else:
         maker = MakerDelta(
             initMidPrice=p0,
-            deltaFunction=lambda x: -delta_fun(x, mat_float),
+            deltaFunction=FixedTtl(repli_delta, mat_float),
             numOneWayOffers=i_nb_offers,
             tickInterval=i_tick_width,
             tickQuantity=None,
@@ -547,12 +576,10 @@ i_detect_trend = rightSide.checkbox("Detect linear trends")
 state_get(sMonteCarlo, [])
 
 
-def monte_carlo_one(resStore: List):
+def monte_carlo_one(resStore: List, path: np.ndarray, template: Maker):
 
-    maker = build_maker(use_latest_price=False)
-    exchange = ExchangeSingleMaker(maker)
+    exchange = ExchangeSingleMaker(template.clone())
 
-    path = simulate_path()
     time = 0
     dt = i_time_delta
     for price in path:
@@ -573,8 +600,10 @@ def monte_carlo_one(resStore: List):
 def monte_carlo_n(nbSim: int):
     resStore = state_get(sMonteCarlo)
 
-    for i in range(nbSim):
-        monte_carlo_one(resStore)
+    # the initial ladder is built once, each path starts from a copy
+    template = build_maker(use_latest_price=False)
+    for path in simulate_paths(len(resStore), nbSim):
+        monte_carlo_one(resStore, path, template)
 
 
 placeholder = col0.empty()
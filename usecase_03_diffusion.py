@@ -2,14 +2,24 @@
 # external arbitrageur.
 
 import logging
+import os
 from exchange_single_maker import ExchangeSingleMaker
 from makers.maker_zero_knowledge import MakerZeroKnowledge
 from makers.maker_delta import MakerDelta
 from makers.maker_replication import MakerReplication
+from makers.delta_surface import DeltaSurface
+from makers.delta_functions import CallDelta, FixedTtl
 import pandas as pd
 import plotly.express as px
-from simul.path_generators import geom_brownian_path
-import utils_black_scholes as bs
+from simul.path_bank import PathBank, cached_source_paths
+from simul.path_generators import (
+    GeomBrownianSource,
+    HestonSource,
+    MertonJumpSource,
+    geom_brownian_path,
+    paired_mean_stderr,
+    path_pair_ids,
+)
 
 
 logging.basicConfig(level=logging.DEBUG)
@@ -17,6 +27,10 @@ logging.basicConfig(level=logging.DEBUG)
 MATURITY = 1.0
 NB_DAY_Y = 252
 NB_SIM_D = 1
+NB_PATHS = 200
+SAMPLING = "antithetic"
+SEED = 123
+PATH_BANK = PathBank(os.environ.get("MMPROFILER_PATH_BANK", ".path_bank"))
 
 # wrap geometrical path generator
 def spawn_path():
@@ -30,6 +44,32 @@ def spawn_path():
     )
 
 
+# any PathSource can drive the exchanges: "gbm", "heston" or "merton"
+MODEL = "gbm"
+if MODEL == "heston":
+    PATH_SOURCE = HestonSource(
+        100, 0.05, 0.04, 2.0, 0.04, 0.5, -0.7, MATURITY * NB_DAY_Y, NB_SIM_D, NB_DAY_Y
+    )
+elif MODEL == "merton":
+    PATH_SOURCE = MertonJumpSource(
+        100, 0.05, 0.2, 5.0, -0.05, 0.1, MATURITY * NB_DAY_Y, NB_SIM_D, NB_DAY_Y
+    )
+else:
+    PATH_SOURCE = GeomBrownianSource(
+        initPrice=100,
+        yearlyDrift=0.05,
+        yearlyVolat=0.2,
+        numDaysToSimul=MATURITY * NB_DAY_Y,
+        numStepPerDay=NB_SIM_D,
+        numDaysPerYearConvention=NB_DAY_Y,
+        sampling=SAMPLING,
+    )
+
+
+def spawn_paths(numPaths: int):
+    return cached_source_paths(PATH_BANK, PATH_SOURCE, numPaths, SEED)
+
+
 # set maker params
 px_init = 100
 tick = 0.5
@@ -40,17 +80,28 @@ size = 2 / (numBids + numOffers)
 def get_maker_delta(num_offers: int, tick_interval: float) -> MakerDelta:
     maker = MakerDelta(
         px_init,
-        lambda x: -bs.call_delta(x, 100, 1, 0, 0.2),
+        FixedTtl(CallDelta(100, 0.2), 1),
         num_offers,
         tick_interval,
     )
     return maker
 
 
+# delta surface shared by all the replication makers (one per path)
+REPLI_SURFACE = DeltaSurface.build(
+    CallDelta(120, 0.2),
+    minPrice=20,
+    maxPrice=400,
+    maxTtl=MATURITY,
+    tolerance=1e-3,
+    minTtl=1 / NB_DAY_Y,
+)
+
+
 def get_maker_repli_hedged(num_offers: int, tick_interval: float) -> MakerReplication:
     maker = MakerReplication(
         px_init,
-        lambda x, t: -bs.call_delta(x, 120, t, 0, 0.2),
+        REPLI_SURFACE,
         maturity=MATURITY,
         numOneWayOffers=num_offers,
         tickInterval=tick_interval,
@@ -58,24 +109,25 @@ def get_maker_repli_hedged(num_offers: int, tick_interval: float) -> MakerReplic
     return maker
 
 
+# makers are built once, every path starts from a clone
+MAKERS = {}
+# MAKERS["delta_0.5_1"] = get_maker_delta(1, 0.5)
+# MAKERS["delta_1.0_1"] = get_maker_delta(1, 1.0)
+# MAKERS["delta_0.5_4"] = get_maker_delta(4, 0.5)
+# MAKERS["delta_2.0_1"] = get_maker_delta(1, 2.0)
+MAKERS["repli_0.5_4"] = get_maker_repli_hedged(8, 0.5)
+# MAKERS["repli_0.5_1"] = get_maker_repli_hedged(1, 0.5)
+# MAKERS["repli_2.0_1"] = get_maker_repli_hedged(1, 2.0)
+# MAKERS["repli_0.2_20"] = get_maker_repli_hedged(20, 0.2)
+
+
 # wrap arbitrage logic
-def simul_one_path():
-
-    makers = {}
-    # makers["delta_0.5_1"] = get_maker_delta(1, 0.5)
-    # makers["delta_1.0_1"] = get_maker_delta(1, 1.0)
-    # makers["delta_0.5_4"] = get_maker_delta(4, 0.5)
-    # makers["delta_2.0_1"] = get_maker_delta(1, 2.0)
-    makers["repli_0.5_4"] = get_maker_repli_hedged(8, 0.5)
-    # makers["repli_0.5_1"] = get_maker_repli_hedged(1, 0.5)
-    # makers["repli_2.0_1"] = get_maker_repli_hedged(1, 2.0)
-    # makers["repli_0.2_20"] = get_maker_repli_hedged(20, 0.2)
+def simul_one_path(path):
 
     exchanges = {}
-    for k, v in makers.items():
-        exchanges[k] = ExchangeSingleMaker(v)
+    for k, v in MAKERS.items():
+        exchanges[k] = ExchangeSingleMaker(v.clone())
 
-    path = spawn_path()
     time = 0
     dt = 1 / NB_SIM_D / NB_DAY_Y
     for price in path:
@@ -99,15 +151,22 @@ def simul_one_path():
 
 # monte carlo
 data = []
-for i in range(200):
+pair_ids = path_pair_ids(NB_PATHS, getattr(PATH_SOURCE, "sampling", "normal"))
+for i, path in enumerate(spawn_paths(NB_PATHS)):
     if i % 100 == 0:
         logging.debug("Computing step: {}".format(i))
-    pnls = simul_one_path()
+    pnls = simul_one_path(path)
+    pnls["pair"] = pair_ids[i]
     data.append(pnls)
 
 sims = pd.concat(data)
 sims["pnl"] = sims["price"] * sims["asset"] + sims["cash"]
 
+# paired paths are averaged first, to keep a fair standard error
+for k, df in sims.groupby("maker"):
+    mean, stderr = paired_mean_stderr(df["pnl"], df["pair"])
+    logging.info("{} pnl: {:.4f} +/- {:.4f}".format(k, mean, stderr))
+
 px.scatter(sims, x="price", y="asset", color="maker").add_hline(y=0).show()
 
 # plotting E[ pnl_T | price_T ]
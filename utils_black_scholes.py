@@ -1,11 +1,43 @@
+from typing import NamedTuple
 import numpy as np
-from scipy.stats import norm
+from scipy.special import ndtr
+
+# Array-native kernels: every function accepts scalars or numpy arrays
+# (broadcast together) and computes d1 once. At expiry (T <= 0) or for a null
+# volatility, values are the exact limits (intrinsic value, delta in {0, 0.5, 1})
+# instead of NaNs.
+
+_INV_SQRT_2PI = 1 / np.sqrt(2 * np.pi)
+
+
+class CallGreeks(NamedTuple):
+    price: np.ndarray
+    delta: np.ndarray
+    gamma: np.ndarray
+    # derivative w.r.t. calendar time (per year), i.e. -dPrice/dT
+    theta: np.ndarray
+
+
+def _d1(S, K, T, r, sigma):
+    """d1, sigma * sqrt(T) and the mask of options still alive"""
+    S, K, T, r, sigma = np.broadcast_arrays(
+        *[np.asarray(x, dtype=np.float64) for x in (S, K, T, r, sigma)]
+    )
+    volT = sigma * np.sqrt(np.maximum(T, 0))
+    alive = volT > 0
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        d1 = (np.log(S / K) + (r + 0.5 * sigma**2) * T) / volT
+    # dead options: N(d1) is 1 in the money, 0 out of the money, 0.5 at the money
+    moneyness = np.sign(S - K * np.exp(-r * np.maximum(T, 0)))
+    expired = np.where(moneyness == 0, 0.0, np.copysign(np.inf, moneyness))
+    d1 = np.where(alive, d1, expired)
+    return d1, volT, alive, (S, K, T, r, sigma)
 
 
 def call_delta(S: float, K: float, T: float, r: float, sigma: float) -> float:
-    d1 = (np.log(S / K) + (r + 0.5 * sigma**2) * T) / (sigma * np.sqrt(T))
-    # d2 = d1 - sigma * np.sqrt(T)
-    return norm.cdf(d1, 0.0, 1)
+    d1, _, _, _ = _d1(S, K, T, r, sigma)
+    return ndtr(d1)[()]
 
 
 def call_price(S: float, K: float, T: float, r: float, sigma: float):
@@ -16,9 +48,24 @@ def call_price(S: float, K: float, T: float, r: float, sigma: float):
     # r: interest rate
     # sigma: volatility of underlying asset
 
-    d1 = (np.log(S / K) + (r + 0.5 * sigma**2) * T) / (sigma * np.sqrt(T))
-    d2 = (np.log(S / K) + (r - 0.5 * sigma**2) * T) / (sigma * np.sqrt(T))
+    return call_greeks(S, K, T, r, sigma).price
+
+
+def call_greeks(S, K, T, r, sigma) -> CallGreeks:
+    """price, delta, gamma and theta of a call, from a single d1 evaluation"""
+    d1, volT, alive, (S, K, T, r, sigma) = _d1(S, K, T, r, sigma)
+    d2 = np.where(alive, d1 - volT, d1)
+
+    discount = np.exp(-r * np.maximum(T, 0))
+    nd1 = ndtr(d1)
+    nd2 = ndtr(d2)
+    pdf = _INV_SQRT_2PI * np.exp(-0.5 * np.where(alive, d1, 0) ** 2)
 
-    price = S * norm.cdf(d1, 0.0, 1.0) - K * np.exp(-r * T) * norm.cdf(d2, 0.0, 1.0)
+    # S==K at expiry gives 0.5 * S - 0.5 * K = 0, the exact intrinsic value
+    price = S * nd1 - K * discount * nd2
+    with np.errstate(divide="ignore", invalid="ignore"):
+        gamma = np.where(alive, pdf / (S * volT), 0.0)
+        theta = np.where(alive, -S * pdf * volT / (2 * T), 0.0)
+    theta = theta - r * K * discount * nd2
 
-    return price
+    return CallGreeks(price[()], nd1[()], gamma[()], theta[()])
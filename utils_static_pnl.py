@@ -0,0 +1,153 @@
+import logging
+from typing import Callable, NamedTuple
+import numpy as np
+from exchange_single_maker import ExchangeSingleMaker
+from makers.delta_functions import evaluate_deltas
+from makers.maker_delta import MakerDelta
+
+# Terminal PnL of a static-curve MakerDelta without running the exchange.
+#
+# The maker is modelled on the fixed grid p_j = initPrice + j * tickInterval.
+# Its state is the level L of the last fill (the level without offer), where
+# it holds delta(p_L). Crossing the interval [p_k, p_k+1] upward sells
+# delta(p_k) - delta(p_k+1) at p_k+1, crossing it downward buys it back at p_k.
+# Cash is therefore a Riemann-Stieltjes sum of the curve: prefix sums over the
+# grid give the cash of any move in O(1), and a path only adds the spread of its
+# round trips. An arbitrage step takes at most numOneWayOffers levels.
+#
+# MakerDelta re-centers its ladder on the arbitrage price rather than on the
+# last filled level, so multi-step paths match the full simulation up to that
+# rounding (see validate_static_pnl). Single jumps from the initial ladder are
+# exact.
+
+
+class StaticPnl(NamedTuple):
+    cash: np.ndarray
+    asset: np.ndarray
+    pnl: np.ndarray
+
+
+class _Grid:
+    """Curve tabulated on the levels [minLevel, maxLevel] of the tick grid"""
+
+    def __init__(self, deltaFun, initPrice, tickInterval, minLevel, maxLevel):
+        # bids are only deployed at positive prices
+        minLevel = max(minLevel, -int(np.ceil(initPrice / tickInterval)) + 1)
+        self.minLevel = minLevel
+        self.maxLevel = maxLevel
+        levels = np.arange(minLevel, maxLevel + 1)
+        self.prices = initPrice + levels * tickInterval
+        self.deltas = evaluate_deltas(deltaFun, self.prices)
+        gammas = self.deltas[:-1] - self.deltas[1:]
+        # cash received selling from minLevel up to each level, paid buying
+        # from each level down to minLevel
+        self.sells = np.concatenate([[0.0], np.cumsum(gammas * self.prices[1:])])
+        self.buys = np.concatenate([[0.0], np.cumsum(gammas * self.prices[:-1])])
+
+    def index(self, level):
+        return np.clip(level, self.minLevel, self.maxLevel) - self.minLevel
+
+    def move(self, fromLevel, toLevel):
+        """cash of the fills from fromLevel to toLevel (arrays)"""
+        i, j = self.index(fromLevel), self.index(toLevel)
+        return np.where(
+            j > i, self.sells[j] - self.sells[i], self.buys[j] - self.buys[i]
+        )
+
+
+def _target_level(prices, initPrice, tickInterval, level):
+    """level of the last fill after arbitrage at prices, from level (the
+    exchange takes asks <= price, bids >= price, TOLERANCE aside)"""
+    steps = (prices - initPrice) / tickInterval
+    up = np.floor(steps + 1e-9).astype(int)
+    down = np.ceil(steps - 1e-9).astype(int)
+    return np.where(up > level, up, np.where(down < level, down, level))
+
+
+def _cap(level, target, numOneWayOffers):
+    if numOneWayOffers is None:
+        return target
+    return np.clip(target, level - numOneWayOffers, level + numOneWayOffers)
+
+
+def static_terminal_pnl(
+    deltaFun: Callable[[float], float],
+    initPrice: float,
+    terminalPrices,
+    tickInterval: float,
+    numOneWayOffers: int = None,
+) -> StaticPnl:
+    """Closed form for a price going monotonically from initPrice to each
+    terminal price (no round trip), in a single jump if numOneWayOffers is
+    given (the depth of the initial ladder caps the fills)."""
+    terminalPrices = np.asarray(terminalPrices, dtype=float)
+    level = _target_level(terminalPrices, initPrice, tickInterval, 0)
+    level = _cap(0, level, numOneWayOffers)
+
+    grid = _Grid(
+        deltaFun, initPrice, tickInterval, min(level.min(), 0), max(level.max(), 0)
+    )
+    asset = grid.deltas[grid.index(level)]
+    cash = -grid.deltas[grid.index(0)] * initPrice + grid.move(0, level)
+    return StaticPnl(cash, asset, cash + asset * terminalPrices)
+
+
+def static_path_pnl(
+    deltaFun: Callable[[float], float],
+    paths: np.ndarray,
+    tickInterval: float,
+    numOneWayOffers: int = None,
+) -> StaticPnl:
+    """Terminal state on each path (numPaths x numSteps, the first column is
+    the initial price), including the spread of round trips. The loop runs on
+    time steps, each one vectorized over all paths."""
+    paths = np.atleast_2d(np.asarray(paths, dtype=float))
+    initPrice = paths[0, 0]
+    if not np.all(paths[:, 0] == initPrice):
+        raise ValueError("paths should share the same initial price.")
+
+    steps = (paths - initPrice) / tickInterval
+    grid = _Grid(
+        deltaFun,
+        initPrice,
+        tickInterval,
+        int(np.floor(steps.min())) - 1,
+        int(np.ceil(steps.max())) + 1,
+    )
+
+    level = np.zeros(len(paths), dtype=int)
+    cash = np.full(len(paths), -grid.deltas[grid.index(0)] * initPrice)
+    for prices in paths[:, 1:].T:
+        target = _target_level(prices, initPrice, tickInterval, level)
+        target = _cap(level, target, numOneWayOffers)
+        cash += grid.move(level, target)
+        level = target
+
+    asset = grid.deltas[grid.index(level)]
+    return StaticPnl(cash, asset, cash + asset * paths[:, -1])
+
+
+def validate_static_pnl(
+    deltaFun: Callable[[float], float],
+    paths: np.ndarray,
+    tickInterval: float,
+    numOneWayOffers: int,
+    timeDelta: float = 1.0,
+):
+    """static_path_pnl against the full ExchangeSingleMaker simulation of
+    MakerDelta on each path. Returns (analytic pnl, simulated pnl) and logs
+    the max absolute difference."""
+    paths = np.atleast_2d(np.asarray(paths, dtype=float))
+    analytic = static_path_pnl(deltaFun, paths, tickInterval, numOneWayOffers).pnl
+
+    simulated = np.empty(len(paths))
+    for i, path in enumerate(paths):
+        maker = MakerDelta(path[0], deltaFun, numOneWayOffers, tickInterval)
+        exchange = ExchangeSingleMaker(maker)
+        exchange.apply_arbitrage_chunks([path[1:]], timeDelta)
+        simulated[i] = maker.cash + maker.asset * path[-1]
+
+    logging.info(
+        "static pnl max abs error: {:.3e}".format(np.max(np.abs(analytic - simulated)))
+    )
+    return analytic, simulated